@@ -0,0 +1,345 @@
+"""Runs `/lichess profile` end to end, against local stand-ins for Lichess and Discord.
+
+Every command loads a user that has not been seen before, responds with their bio, and
+then navigates to their rating history, so that nothing is served from the caches.
+Measures how long commands take one at a time and how many complete per second when
+several run at once, how long a graph takes to render, and the peak memory of the bot
+and its render workers. Then runs a burst of commands at the pace Lichess asks for,
+and counts how many were not acknowledged within Discord's three seconds.
+
+Results are printed, and can be saved as JSON with `--output` to be compared against
+later with `--baseline`. Run with `python benchmarks/e2e.py` from the repository root,
+and see `--help` for how to slow down or rate limit the stand-ins. Graphs are attached
+to responses unless `GRAPH_ATTACH=false` is set, which uploads them instead.
+"""
+import argparse
+import asyncio
+from itertools import count
+import os
+from pathlib import Path
+import resource
+import shutil
+import statistics
+import subprocess  # noqa: S404 - only runs git, with fixed arguments
+import sys
+import time
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+# the stand-ins are fast enough that the bot's own limits would be all that is measured,
+# so the real limits are only applied to the deadline check
+os.environ.setdefault("LICHESS_RATE", "1000")
+os.environ.setdefault("LICHESS_BURST", "1000")
+os.environ.setdefault("LICHESS_BACKOFF", "1")
+os.environ.setdefault("UPLOAD_CHANNEL", "1")
+
+from fakes import FakeDiscord, FakeLichess  # noqa: E402
+from modules.chess.lichess import profile  # noqa: E402
+
+import utils.graphs  # noqa: E402
+import utils.http  # noqa: E402
+from utils.models.lichess import LichessUser  # noqa: E402
+import utils.render  # noqa: E402
+import utils.router  # noqa: E402
+from utils.views.lichess import GRAPH_PROFILE, LichessUserFormatter  # noqa: E402
+
+_USERNAMES = count()
+
+# how long Discord waits for an interaction to be responded to, in seconds
+DEADLINE = 3.0
+# the pace Lichess asks for, in requests per second and in a burst
+LICHESS_RATE = 2.0
+LICHESS_BURST = 6
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summarizes durations.
+
+    Args:
+        samples (list[float]): The durations, in seconds.
+
+    Returns:
+        dict[str, float]: The mean, median, 95th percentile and maximum, in
+            milliseconds.
+    """
+    if not samples:
+        return {}
+    if len(samples) == 1:
+        samples = samples * 2
+
+    return {
+        "mean": statistics.fmean(samples) * 1000,
+        "p50": statistics.median(samples) * 1000,
+        "p95": statistics.quantiles(samples, n=20, method="inclusive")[-1] * 1000,
+        "max": max(samples) * 1000,
+    }
+
+
+async def acknowledge(discord: FakeDiscord) -> tuple[float, bool]:
+    """Looks up a new user, without navigating anywhere.
+
+    Args:
+        discord (FakeDiscord): Where the command is responded to.
+
+    Raises:
+        RuntimeError: The command was deferred, but never answered.
+
+    Returns:
+        tuple[float, bool]: How long the command took to be acknowledged, in seconds,
+            and whether it was answered with a rate limit instead of the profile.
+    """
+    ctx = discord.context(username=f"benchmark{next(_USERNAMES)}")
+
+    start = time.perf_counter()
+    try:
+        await profile.callback(ctx)
+    finally:
+        utils.router.components.close(ctx.message)
+
+    if not ctx.answers:
+        raise RuntimeError(f"{ctx.options.username} was deferred, but not answered")
+
+    answer = ctx.answers[-1]
+    limited = isinstance(answer, str) and answer.startswith("Lichess is rate limiting")
+    return ctx.acknowledged - start, limited
+
+
+async def command(discord: FakeDiscord) -> tuple[float, float]:
+    """Looks up a new user, and then their rating history.
+
+    Args:
+        discord (FakeDiscord): Where the command is responded to.
+
+    Returns:
+        tuple[float, float]: How long the profile took to be responded to, and how
+            long the rating history then took, in seconds.
+    """
+    ctx = discord.context(username=f"benchmark{next(_USERNAMES)}")
+
+    start = time.perf_counter()
+    await profile.callback(ctx)
+    responded = time.perf_counter()
+
+    # the same session that a pick from the select menu would be routed to
+    session = utils.router.components._sessions[ctx.message]
+    await session.handle(discord.interaction("history"))
+    navigated = time.perf_counter()
+
+    utils.router.components.close(ctx.message)
+    return responded - start, navigated - responded
+
+
+async def render(count: int) -> dict[str, float]:
+    """Renders the same rating history repeatedly, bypassing the render cache."""
+    user = await LichessUser.load(f"benchmark{next(_USERNAMES)}")
+    args = LichessUserFormatter(user, None)._graph_args()
+    samples = []
+
+    for _ in range(count):
+        start = time.perf_counter()
+        await utils.render.pool.run(utils.graphs.rating_history, *args, GRAPH_PROFILE)
+        samples.append(time.perf_counter() - start)
+
+    return summarize(samples)
+
+
+async def deadline(discord: FakeDiscord, concurrency: int) -> dict[str, float]:
+    """Runs commands at once, rate limited the way they would be against Lichess.
+
+    Args:
+        discord (FakeDiscord): Where the commands are responded to.
+        concurrency (int): How many commands run at once.
+
+    Returns:
+        dict[str, float]: How many commands were acknowledged too late, how many
+            were told to try again because their requests would have waited too long,
+            and how long acknowledging them took.
+    """
+    limiter = utils.http.lichess.limiter
+    utils.http.lichess.limiter = utils.http.RateLimiter(
+        LICHESS_RATE, LICHESS_BURST, limiter.backoff, limiter.max_wait
+    )
+
+    # any command that fails or is left unanswered fails the benchmark
+    try:
+        done = await asyncio.gather(*(acknowledge(discord) for _ in range(concurrency)))
+    finally:
+        utils.http.lichess.limiter = limiter
+
+    return {
+        "late": sum(elapsed > DEADLINE for elapsed, _ in done),
+        "refused": sum(limited for _, limited in done),
+        "acknowledged": summarize([elapsed for elapsed, _ in done]),
+    }
+
+
+async def run(options: argparse.Namespace) -> dict:
+    """Runs every benchmark.
+
+    Args:
+        options (argparse.Namespace): The command line options.
+
+    Returns:
+        dict: The results.
+    """
+    lichess = FakeLichess(latency=options.latency / 1000, rate_limit=options.rate_limit)
+    discord = FakeDiscord(latency=options.discord_latency / 1000)
+    utils.http.lichess.url = await lichess.start()
+
+    errors: dict[str, int] = {}
+    results = {}
+
+    async def measure(concurrency: int) -> tuple[list[float], list[float], float]:
+        start = time.perf_counter()
+        done = await asyncio.gather(
+            *(command(discord) for _ in range(concurrency)), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+
+        for result in done:
+            if isinstance(result, BaseException):
+                errors[type(result).__name__] = errors.get(type(result).__name__, 0) + 1
+
+        times = [result for result in done if not isinstance(result, BaseException)]
+        return [p for p, _ in times], [h for _, h in times], elapsed
+
+    try:
+        await utils.render.pool.start()
+        results["render"] = await render(options.renders)
+
+        profiles, histories = [], []
+        for _ in range(options.samples):
+            p, h, _ = await measure(1)
+            profiles += p
+            histories += h
+        results["latency"] = {
+            "profile": summarize(profiles),
+            "history": summarize(histories),
+        }
+
+        results["throughput"] = {}
+        for concurrency in options.concurrency:
+            p, h, elapsed = await measure(concurrency)
+            results["throughput"][str(concurrency)] = {
+                "commands_per_second": len(p) / elapsed,
+                "profile": summarize(p),
+                "history": summarize(h),
+            }
+
+        results["deadline"] = await deadline(discord, options.deadline)
+    finally:
+        await utils.router.components.stop()
+        await utils.render.pool.close()
+        await utils.http.lichess.close()
+        await lichess.close()
+
+    results["errors"] = errors
+    results["requests"] = {
+        "lichess": lichess.requests,
+        "connections": lichess.connections,
+        "limited": lichess.limited,
+        **discord.calls,
+    }
+    results["peak_rss_mib"] = {
+        "bot": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+    return results
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Flattens nested results into dotted names."""
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat |= flatten(value, f"{prefix}{name}.")
+        elif isinstance(value, (int, float)):
+            flat[prefix + name] = value
+    return flat
+
+
+def commit() -> str | None:
+    """The commit being benchmarked, if it can be found."""
+    if (git := shutil.which("git")) is None:
+        return None
+
+    try:
+        # git is resolved to a full path above, and none of the arguments are input
+        return subprocess.run(  # noqa: S603
+            [git, "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Runs the benchmarks, and prints, saves or compares their results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--latency", type=float, default=50, help="Lichess latency in ms"
+    )
+    parser.add_argument(
+        "--discord-latency", type=float, default=100, help="Discord latency in ms"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0,
+        help="chance of Lichess responding with a 429",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=10, help="commands run one at a time"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[8, 32],
+        help="how many commands run at once",
+    )
+    parser.add_argument("--renders", type=int, default=5, help="graphs rendered")
+    parser.add_argument(
+        "--deadline",
+        type=int,
+        default=12,
+        help="commands run at once at the pace Lichess asks for",
+    )
+    parser.add_argument("--output", type=Path, help="where to save the results")
+    parser.add_argument("--baseline", type=Path, help="results to compare against")
+    options = parser.parse_args()
+
+    results = {
+        "commit": commit(),
+        "options": {
+            name: value
+            for name, value in vars(options).items()
+            if name not in ("output", "baseline")
+        },
+        **asyncio.run(run(options)),
+    }
+
+    if options.output is not None:
+        options.output.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+    before = (
+        flatten(orjson.loads(options.baseline.read_bytes()))
+        if options.baseline is not None
+        else {}
+    )
+    for name, value in flatten(results).items():
+        if name.startswith("options."):
+            continue
+        if (old := before.get(name)) is None:
+            print(f"{name:>40}: {value:10.2f}")
+        else:
+            change = f"{(value - old) / old:+.0%}" if old else ""
+            print(f"{name:>40}: {old:10.2f} -> {value:10.2f} {change}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measures how long switching between the tabs of a profile takes.
+
+Compares the deepcopy that cached embeds used to be copied with against building a
+new embed from its spec. Run with `python benchmarks/embeds.py` from the repository
+root.
+"""
+import asyncio
+import copy
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from synthetic import public_data  # noqa: E402
+
+from utils.models.lichess import LichessUser  # noqa: E402
+from utils.views.lichess import LichessUserEmbed, LichessUserFormatter  # noqa: E402
+
+
+async def formatter() -> LichessUserFormatter:
+    """Builds the bio and rating tabs of a synthetic player."""
+    user = LichessUser.parse(public_data(), [], ["🏆"] * 5)
+    formatter = LichessUserFormatter(user, None)
+
+    for form in (LichessUserEmbed.bio, LichessUserEmbed.rating):
+        await formatter.embed(form)
+
+    return formatter
+
+
+def main(number: int = 10000) -> None:
+    """Prints the time it takes to get each cached tab."""
+    cached = asyncio.run(formatter())
+
+    for (form, _), spec in cached.embeds.items():
+        embed = spec.build()
+        deepcopy = min(timeit.repeat(lambda: copy.deepcopy(embed), number=number))
+        build = min(timeit.repeat(spec.build, number=number))
+        print(
+            f"{form.value:<8} {len(embed.fields):>2} fields | "
+            f"deepcopy {deepcopy / number * 1e6:7.1f} us | "
+            f"spec {build / number * 1e6:7.1f} us | "
+            f"{deepcopy / build:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
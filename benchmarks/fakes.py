@@ -0,0 +1,293 @@
+"""Local stand-ins for Lichess and Discord, for benchmarks that run end to end.
+
+`FakeLichess` serves synthetic profiles, rating histories and game exports, and the
+recorded profile pages in `fixtures/`, over real HTTP. `FakeDiscord` takes the place of
+a bot's REST client and of the interactions it responds to. Both can be made slower,
+and Lichess can be made to rate limit, to see how the bot copes.
+"""
+import asyncio
+from itertools import count
+from pathlib import Path
+import random
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+import hikari
+from hikari.impl.special_endpoints import ActionRowBuilder
+import orjson
+from synthetic import game, public_data, rating_history
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeLichess:
+    """A local Lichess that every username exists on.
+
+    Responses are generated ahead of time, so that the server itself adds as little
+    time as possible. Each user gets one of a few variants, picked by their name.
+    `connections` counts the connections clients have opened, to show whether they are
+    reused.
+
+    Args:
+        latency (float, optional): How long every response is held back for, in
+            seconds. Defaults to 0.
+        rate_limit (float, optional): The chance of any request being answered with a
+            429. Defaults to 0.
+        variants (int, optional): How many different histories and profile pages are
+            served. Defaults to 4.
+        seed (int, optional): The seed for the random generator. Defaults to 0.
+    """
+
+    __slots__ = (
+        "latency",
+        "rate_limit",
+        "requests",
+        "limited",
+        "exported",
+        "_peers",
+        "_histories",
+        "_bodies",
+        "_pages",
+        "_random",
+        "_runner",
+        "url",
+    )
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0,
+        rate_limit: float = 0,
+        variants: int = 4,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.limited = 0
+        self.exported = 0
+        self._peers: set[tuple] = set()
+        self._histories = [rating_history(seed=seed + i) for i in range(variants)]
+        self._bodies = [orjson.dumps(history) for history in self._histories]
+        self._pages = [page.read_bytes() for page in sorted(FIXTURES.glob("*.html"))]
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    @property
+    def connections(self) -> int:
+        """How many connections clients have opened."""
+        return len(self._peers)
+
+    def _variant(self, username: str) -> int:
+        return sum(username.lower().encode())
+
+    def _public_data(self, username: str) -> dict:
+        # ratings agree with the history the user is served
+        variant = self._variant(username)
+        history = self._histories[variant % len(self._histories)]
+        return public_data(username, variant, history)
+
+    @web.middleware
+    async def _middleware(
+        self, request: web.Request, handler: web.RequestHandler
+    ) -> web.StreamResponse:
+        self.requests += 1
+        self._peers.add(request.transport.get_extra_info("peername"))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self._random.random() < self.rate_limit:
+            self.limited += 1
+            return web.Response(status=429)
+
+        return await handler(request)
+
+    async def _user(self, request: web.Request) -> web.Response:
+        username = request.match_info["username"]
+        return web.Response(
+            body=orjson.dumps(self._public_data(username)),
+            content_type="application/json",
+        )
+
+    async def _users(self, request: web.Request) -> web.Response:
+        usernames = (await request.text()).split(",")
+        return web.Response(
+            body=orjson.dumps([self._public_data(name) for name in usernames]),
+            content_type="application/json",
+        )
+
+    async def _history(self, request: web.Request) -> web.Response:
+        bodies = self._bodies
+        return web.Response(
+            body=bodies[self._variant(request.match_info["username"]) % len(bodies)],
+            content_type="application/json",
+        )
+
+    async def _page(self, request: web.Request) -> web.Response:
+        pages = self._pages
+        return web.Response(
+            body=pages[self._variant(request.match_info["username"]) % len(pages)],
+            content_type="text/html",
+            charset="utf-8",
+        )
+
+    async def _games(self, request: web.Request) -> web.StreamResponse:
+        # every user has played a million games, which are streamed as they are made
+        username = request.match_info["username"]
+        rng = random.Random(username)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+
+        try:
+            for _ in range(int(request.query.get("max", 1_000_000))):
+                await response.write(orjson.dumps(game(username, rng)) + b"\n")
+                self.exported += 1
+        except ConnectionError:
+            # the export was stopped part way, which is what Lichess sees too
+            return response
+
+        await response.write_eof()
+        return response
+
+    async def start(self) -> str:
+        """Starts serving on a free local port.
+
+        Returns:
+            str: The URL of the server, for `LICHESS_URL`.
+        """
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/user/{username}", self._user)
+        app.router.add_get("/api/user/{username}/rating-history", self._history)
+        app.router.add_post("/api/users", self._users)
+        app.router.add_get("/@/{username}", self._page)
+        app.router.add_get("/api/games/user/{username}", self._games)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def close(self) -> None:
+        """Stops the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class FakeDiscord:
+    """A bot's REST client, and the responses to its commands, without Discord.
+
+    Every call to Discord takes `latency` seconds, and is counted by its name.
+
+    Args:
+        latency (float, optional): How long every call to Discord takes, in seconds.
+            Defaults to 0.
+    """
+
+    __slots__ = ("latency", "calls", "rest", "_ids")
+
+    def __init__(self, *, latency: float = 0) -> None:
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        self.rest = SimpleNamespace(
+            build_action_row=ActionRowBuilder,
+            create_message=self._create_message,
+        )
+        self._ids = count(1)
+
+    async def _call(self, name: str, **kwargs: object) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+        # files are read as they would be to be sent
+        for key in ("attachment", "embed"):
+            resource = kwargs.get(key)
+            if key == "embed":
+                # plain text responses have no image
+                image = getattr(resource, "image", None)
+                resource = image and image.resource
+            if isinstance(resource, hikari.files.Bytes):
+                await resource.read()
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _create_message(
+        self, channel: hikari.Snowflakeish, **kwargs: object
+    ) -> SimpleNamespace:
+        await self._call("create_message", **kwargs)
+        attachment = SimpleNamespace(
+            url=f"https://cdn.discordapp.com/attachments/{channel}/{next(self._ids)}"
+        )
+        return SimpleNamespace(attachments=[attachment])
+
+    def context(self, **options: object) -> SimpleNamespace:
+        """Creates the context of a slash command.
+
+        Args:
+            **options (object): The options the command was invoked with.
+
+        Returns:
+            SimpleNamespace: The context, which can only respond. `message` is the ID
+                its response will have, `acknowledged` when it was first responded to
+                or deferred, from `time.perf_counter`, and `answers` what it was
+                responded with, other than deferrals.
+        """
+        message = hikari.Snowflake(next(self._ids))
+
+        async def respond(*args: object, **kwargs: object) -> SimpleNamespace:
+            if args and isinstance(args[0], hikari.ResponseType):
+                await self._call("defer")
+            else:
+                await self._call("respond", embed=args[0] if args else None, **kwargs)
+                context.answers.append(args[0] if args else None)
+
+            if context.acknowledged is None:
+                context.acknowledged = time.perf_counter()
+
+            async def fetch() -> hikari.Snowflake:
+                return message
+
+            async def edit(**kwargs: object) -> None:
+                await self._call("edit", **kwargs)
+
+            return SimpleNamespace(message=fetch, edit=edit)
+
+        context = SimpleNamespace(
+            bot=self,
+            options=SimpleNamespace(**options),
+            respond=respond,
+            message=message,
+            acknowledged=None,
+            answers=[],
+        )
+        return context
+
+    def interaction(self, *values: str) -> SimpleNamespace:
+        """Creates an interaction with a select menu.
+
+        Args:
+            *values (str): The options that were picked.
+
+        Returns:
+            SimpleNamespace: The interaction, which can only be responded to.
+        """
+
+        async def create_initial_response(*_: object, **kwargs: object) -> None:
+            await self._call("create_initial_response", **kwargs)
+
+        async def edit_initial_response(**kwargs: object) -> None:
+            await self._call("edit_initial_response", **kwargs)
+
+        return SimpleNamespace(
+            values=list(values),
+            create_initial_response=create_initial_response,
+            edit_initial_response=edit_initial_response,
+        )
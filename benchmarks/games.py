@@ -0,0 +1,89 @@
+"""Measures the memory and throughput of analysing game exports.
+
+Streams exports of increasing length from a local stand-in for Lichess, counting every
+game, and reports the peak memory allocated while doing so along with how many games
+are counted per second, then how many games are sent after an analysis is stopped part
+way. That the counts are right, memory stays flat and stopping closes the export is
+checked in tests/test_games.py. Run with `python benchmarks/games.py` from the
+repository root.
+"""
+import asyncio
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from fakes import FakeLichess  # noqa: E402
+
+import utils.http  # noqa: E402
+from utils.models.games import LichessGameStats, export  # noqa: E402
+
+
+async def analyse(limit: int) -> tuple[LichessGameStats, float, int]:
+    """Counts a user's most recent games.
+
+    Returns:
+        tuple[LichessGameStats, float, int]: The counts, how long they took in seconds,
+            and the peak memory allocated while counting, in bytes.
+    """
+    stats = LichessGameStats("Benchmark")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    async for game in export(stats.username, limit=limit):
+        stats.add(game)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return stats, elapsed, peak
+
+
+async def stop(lichess: FakeLichess, after: int) -> int:
+    """Stops counting part way through an export.
+
+    Returns:
+        int: How many more games the stand-in sent after the analysis was stopped.
+    """
+    stats = LichessGameStats("Benchmark")
+
+    async def count() -> None:
+        async for game in export(stats.username):
+            stats.add(game)
+            if stats.games == after:
+                task.cancel()
+                # lets the cancellation land mid-stream
+                await asyncio.sleep(0)
+
+    task = asyncio.create_task(count())
+    await asyncio.wait([task])
+
+    # any games written after this point went to a closed connection
+    sent = lichess.exported
+    await asyncio.sleep(0.5)
+    return lichess.exported - sent
+
+
+async def main() -> None:
+    """Prints the memory and throughput of each export, and what stopping one sends."""
+    lichess = FakeLichess()
+    utils.http.lichess.url = await lichess.start()
+
+    try:
+        for limit in (1_000, 10_000, 100_000):
+            _, elapsed, peak = await analyse(limit)
+            print(
+                f"{limit:>7} games: {peak / 1024:7.1f} KiB peak, "
+                + f"{limit / elapsed:8.0f} games/s"
+            )
+
+        print(f"stopped: {await stop(lichess, 5_000)} games sent after stopping")
+    finally:
+        await utils.http.lichess.close()
+        await lichess.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""Measures render time and size of rating-history graphs.
+
+Compares each output profile, then checks that downsampling keeps render time flat as
+accounts age without visibly changing the graph. That downsampled graphs stay close to
+the originals is tested in `tests/test_graphs.py`.
+
+Run with `python benchmarks/graphs.py` from the repository root.
+"""
+import io
+from pathlib import Path
+import sys
+import time
+
+from PIL import Image
+import numpy
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from synthetic import rating_history  # noqa: E402
+
+from utils.constants import LICHESS  # noqa: E402
+import utils.graphs  # noqa: E402
+from utils.models.lichess import LichessUser  # noqa: E402
+
+CASES = {
+    "1 year, 3 modes": {"years": 1, "modes": 3},
+    "5 years, 8 modes": {"years": 5, "modes": 8},
+    "10 years, 15 modes": {"years": 10, "modes": 15},
+}
+
+
+def series(years: int, modes: int, density: float = 0.6) -> list[utils.graphs.Series]:
+    """Builds the series the formatter would send to the render pool."""
+    return [
+        (
+            history.mode.value,
+            history.days,
+            history.ratings,
+            LICHESS.styles[history.mode.name].color,
+            LICHESS.styles[history.mode.name].linestyle,
+        )
+        for history in LichessUser.parse_history(
+            rating_history(years=years, modes=modes, density=density)
+        )
+    ]
+
+
+def measure(
+    data: list[utils.graphs.Series], profile: utils.graphs.GraphProfile, repeat: int
+) -> tuple[float, int]:
+    """Renders a graph a few times, returning the best time and the size."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        graph = utils.graphs.rating_history("Benchmark", data, profile)
+        best = min(best, time.perf_counter() - start)
+    return best, len(graph)
+
+
+def downsampled(
+    data: list[utils.graphs.Series], profile: utils.graphs.GraphProfile
+) -> list[utils.graphs.Series]:
+    """Downsamples every series the same way the formatter does."""
+    start = min(days[0] for _, days, *_ in data)
+    end = max(days[-1] for _, days, *_ in data)
+    columns = int(profile.pixels[0] * utils.graphs.AXES[2])
+    return [
+        (label, *utils.graphs.downsample(days, ratings, start, end, columns), *style)
+        for label, days, ratings, *style in data
+    ]
+
+
+def difference(first: bytes, second: bytes) -> float:
+    """The mean difference between two images, as Discord would display them.
+
+    Both images are shrunk to the size of an embed image first. Comparing at full size
+    mostly measures how dash patterns shift, rather than anything a reader could see.
+    """
+    first, second = (
+        numpy.asarray(
+            Image.open(io.BytesIO(image)).convert("RGBA").resize((400, 300), Image.BOX),
+            dtype=numpy.float64,
+        )
+        for image in (first, second)
+    )
+    return float(numpy.abs(first - second).mean() / 255)
+
+
+def main(repeat: int = 3) -> None:
+    """Prints tables of render times and sizes."""
+    utils.graphs.warm()
+
+    for case, kwargs in CASES.items():
+        data = series(**kwargs)
+        print(case)
+
+        for name, profile in utils.graphs.PROFILES.items():
+            elapsed, size = measure(data, profile, repeat)
+            width, height = profile.pixels
+            print(
+                f"    {name:<18} {width:>5}x{height:<5} "
+                f"{elapsed * 1000:8.1f} ms {size / 1024:9.1f} KiB"
+            )
+
+    profile = utils.graphs.PROFILES["discord"]
+    print("downsampling (discord profile, 15 modes, daily points)")
+
+    for years in (1, 5, 10, 20):
+        data = series(years, 15, density=1.0)
+        thin = downsampled(data, profile)
+        full_time, _ = measure(data, profile, repeat)
+        thin_time, _ = measure(thin, profile, repeat)
+        diff = difference(
+            utils.graphs.rating_history("Benchmark", data, profile),
+            utils.graphs.rating_history("Benchmark", thin, profile),
+        )
+        points = sum(len(days) for _, days, *_ in data)
+        kept = sum(len(days) for _, days, *_ in thin)
+        print(
+            f"    {years:>2} years: {points:>7} -> {kept:>6} points | "
+            f"full {full_time * 1000:7.1f} ms | downsampled {thin_time * 1000:7.1f} ms"
+            f" | {diff:.2%} mean difference"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compares rating-history parsing against its earlier implementations.
+
+`legacy` is the original per-row gap filling, and `pandas` is the vectorized version
+that still built a pandas series per mode. Run with `python benchmarks/history.py` from
+the repository root.
+"""
+from datetime import timedelta
+from pathlib import Path
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+import numpy
+import pandas
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from synthetic import rating_history  # noqa: E402
+
+from utils.models.lichess import LichessUser  # noqa: E402
+
+
+def legacy(rating_history: list[dict]) -> list[pandas.Series]:
+    """The gap filling loop as it was before vectorization."""
+    history = []
+    for i, _ in enumerate(rating_history):
+        try:
+            points = numpy.array(rating_history[i]["points"])
+            points[:, 1] += 1
+            dates = pandas.to_datetime(
+                pandas.DataFrame(points[:, :3], columns=["year", "month", "day"])
+            )
+            ratings = pandas.Series(points[:, 3], index=dates)
+        except IndexError:
+            continue
+
+        final_ratings = ratings.copy()
+
+        for j, item in enumerate(ratings.items()):
+            date, _ = item
+            if j > 0:
+                last_date = ratings.index.values[j - 1]
+
+                if last_date != date - timedelta(days=1):
+                    final_ratings.loc[date - timedelta(days=1)] = ratings[last_date]
+
+        history.append(final_ratings.sort_index())
+
+    return history
+
+
+def vectorized(rating_history: list[dict]) -> list[pandas.Series]:
+    """The vectorized gap filling that still kept a pandas series per mode."""
+    history = []
+    for mode in rating_history:
+        try:
+            points = numpy.array(mode["points"])
+            points[:, 1] += 1
+            dates = pandas.to_datetime(
+                pandas.DataFrame(points[:, :3], columns=["year", "month", "day"])
+            )
+            ratings = pandas.Series(points[:, 3], index=dates)
+        except IndexError:
+            continue
+
+        gaps = numpy.flatnonzero(
+            numpy.diff(ratings.index.values) != numpy.timedelta64(1, "D")
+        )
+        steps = pandas.Series(
+            ratings.values[gaps], index=ratings.index[gaps + 1] - timedelta(days=1)
+        )
+        history.append(pandas.concat([ratings, steps]).sort_index())
+
+    return history
+
+
+def retained(parse: Callable[[list[dict]], Any], data: list[dict]) -> int:
+    """Measures how many bytes the result of a parse keeps alive."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = parse(data)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main() -> None:
+    """Checks that the implementations agree, then times and weighs them."""
+    for years in (1, 5, 10):
+        data = rating_history(years=years)
+
+        for old, new in zip(legacy(data), LichessUser.parse_history(data)):
+            pandas.testing.assert_series_equal(old, new.to_series(), check_dtype=False)
+
+        print(f"{years:>2} years: outputs match")
+
+        times = {
+            "legacy": timeit.timeit(lambda: legacy(data), number=1),
+            "pandas": min(timeit.repeat(lambda: vectorized(data), number=1, repeat=5)),
+            "compact": min(
+                timeit.repeat(
+                    lambda: LichessUser.parse_history(data), number=1, repeat=5
+                )
+            ),
+        }
+        sizes = {
+            "pandas": retained(vectorized, data),
+            "compact": retained(LichessUser.parse_history, data),
+        }
+
+        print(
+            "    parse: "
+            + " | ".join(f"{k} {v * 1000:.1f} ms" for k, v in times.items())
+        )
+        print(
+            "    retained: "
+            + " | ".join(f"{k} {v / 1024:.0f} KiB" for k, v in sizes.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
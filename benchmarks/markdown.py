@@ -0,0 +1,62 @@
+"""Measures escaping markdown and mentions.
+
+Times the single pass escaper against the two passes it replaced on bios with and
+without anything to escape. That both escape text the same way, and that the text of
+masked links reads back as it was written, is checked in tests/test_markdown.py. Run
+with `python benchmarks/markdown.py` from the repository root.
+"""
+from pathlib import Path
+import re
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from utils.markdown import escape  # noqa: E402
+
+_MARKDOWN_ESCAPE_COMMON = r"^>(?:>>)?\s|\[.+\]\(.+\)"
+_MARKDOWN_STOCK_REGEX = rf"(?P<markdown>[_\\~|\*`]|{_MARKDOWN_ESCAPE_COMMON})"
+
+PIECES = (
+    *"_\\~|*`>[]() \nab1",
+    "@everyone",
+    "@here",
+    "@",
+    "@!",
+    "@&",
+    "0" * 18,
+    "> ",
+    ">>> ",
+    "[text](https://lichess.org)",
+)
+
+PLAIN = "Chess player from somewhere. I mostly play blitz and rapid. gl hf! " * 3
+MARKDOWN = "**GM** _from_ ~~nowhere~~ | `e4` > [me](https://lichess.org) @here " * 3
+
+
+def legacy(text: str | None) -> str:
+    """Escapes text the way it was before it was done in a single pass."""
+
+    def replacement(match: re.Match) -> str:
+        groupdict = match.groupdict()
+        if url := groupdict.get("url"):
+            return url
+        return "\\" + groupdict["markdown"]
+
+    text = re.sub(r"@(everyone|here|[!&]?[0-9]{17,20})", "@\u200b\\1", text or "")
+    return re.sub(_MARKDOWN_STOCK_REGEX, replacement, text, 0, re.MULTILINE)
+
+
+def main(number: int = 20000) -> None:
+    """Prints the time it takes to escape each bio."""
+    for name, text in (("plain", PLAIN), ("markdown", MARKDOWN)):
+        before = min(timeit.repeat(lambda: legacy(text), number=number, repeat=3))
+        after = min(timeit.repeat(lambda: escape(text), number=number, repeat=3))
+        print(
+            f"{name:>8}: {before / number * 1e6:6.2f} µs "
+            f"-> {after / number * 1e6:6.2f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measures refreshing a rating history from a newer profile.
+
+Compares how long a refresh takes against parsing the full history, before the time to
+download it is even counted. That a refreshed history parses exactly as the full one
+would, and is only refused when a full reload is really needed, is checked in
+tests/test_refresh.py. Run with `python benchmarks/refresh.py` from the repository root.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+import random
+import sys
+import timeit
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from synthetic import public_data, rating_history  # noqa: E402
+
+from utils.models.lichess import (  # noqa: E402
+    LichessHistorySnapshot,
+    LichessMode,
+    LichessUser,
+)
+
+EPOCH = date(1970, 1, 1)
+
+
+def play(
+    rng: random.Random, history: list[dict], profile: dict, day: int
+) -> tuple[list[dict], dict, bool]:
+    """Plays a game of a random mode, the way Lichess would record it.
+
+    Returns:
+        tuple[list[dict], dict, bool]: The new rating history and profile, and
+            whether the mode had never been played before.
+    """
+    history = orjson.loads(orjson.dumps(history))
+    profile = orjson.loads(orjson.dumps(profile))
+
+    mode = rng.choice(history)
+    new = not mode["points"]
+    name = LichessMode(mode["name"]).name
+    perf = profile["perfs"][name]
+    perf["games"] += 1
+    perf["rating"] += rng.randint(-20, 20)
+
+    today = EPOCH + timedelta(days=day)
+    point = [today.year, today.month - 1, today.day, perf["rating"]]
+    if mode["points"] and mode["points"][-1][:3] == point[:3]:
+        mode["points"][-1] = point
+    else:
+        mode["points"].append(point)
+
+    return history, profile, new
+
+
+def main(number: int = 50) -> None:
+    """Prints how long a refresh takes against parsing the full history."""
+    rng = random.Random(0)
+    history = rating_history()
+    profile = public_data(history=history)
+    day = (date.today() - EPOCH).days
+    snapshot = LichessHistorySnapshot.take(
+        profile, LichessUser.parse_history(history), day
+    )
+    history, newer, _ = play(rng, history, profile, day)
+
+    body = orjson.dumps(history)
+    full = min(
+        timeit.repeat(
+            lambda: LichessUser.parse_history(orjson.loads(body)), number=number
+        )
+    )
+    refresh = min(timeit.repeat(lambda: snapshot.refresh(newer, day), number=number))
+    print(
+        f"{len(body) / 1024:.0f} KiB history: parsed in {full / number * 1e3:.2f} ms, "
+        + f"refreshed in {refresh / number * 1e3:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
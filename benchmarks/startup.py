@@ -0,0 +1,66 @@
+"""Reports what the bot imports before it connects, and how long that takes.
+
+Imports the entry point and every command module under `python -X importtime`, then
+prints the slowest imports. Exits with an error if any module that is meant to be
+imported lazily was imported at startup. Run with `python benchmarks/startup.py` from
+the repository root.
+"""
+from pathlib import Path
+import subprocess  # noqa: S404 - only runs this interpreter, never user input
+import sys
+
+JIBRIL = Path(__file__).parent.parent / "jibril"
+sys.path.insert(0, str(JIBRIL))
+
+from utils.defaults import MODULES  # noqa: E402
+from utils.preload import MODULES as LAZY  # noqa: E402
+
+# other modules that only graphs and benchmarks should ever import
+LAZY = (*LAZY, "pandas", "matplotlib", "bs4")
+
+
+def importtime() -> dict[str, tuple[int, int]]:
+    """Imports the bot in a fresh interpreter.
+
+    Returns:
+        dict[str, tuple[int, int]]: The time each module took to import by itself and
+            including its own imports, in microseconds.
+    """
+    code = ";".join(f"import {module}" for module in ("main", *MODULES))
+    # the command is this interpreter and module names from the bot's own settings
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=JIBRIL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(own), int(cumulative)
+
+    return times
+
+
+def main(top: int = 15) -> None:
+    """Prints the slowest imports, and fails if a lazy module was imported."""
+    times = importtime()
+    total = sum(own for own, _ in times.values())
+
+    print(f"{len(times)} modules imported in {total / 1000:.1f} ms")
+    for name, (own, cumulative) in sorted(
+        times.items(), key=lambda item: item[1][1], reverse=True
+    )[:top]:
+        print(f"    {cumulative / 1000:8.1f} ms {own / 1000:8.1f} ms  {name}")
+
+    if eager := [module for module in LAZY if module in times]:
+        sys.exit(f"imported at startup, but should be lazy: {', '.join(eager)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Synthetic Lichess data for benchmarks."""
+from datetime import date, timedelta
+import random
+
+MODES = [
+    "Bullet",
+    "Blitz",
+    "Rapid",
+    "Classical",
+    "Correspondence",
+    "Chess960",
+    "King of the Hill",
+    "Three-check",
+    "Antichess",
+    "Atomic",
+    "Horde",
+    "Racing Kings",
+    "Crazyhouse",
+    "Puzzles",
+    "UltraBullet",
+]
+ALL_MODES = len(MODES)
+# the key of each mode in a profile's perfs
+KEYS = dict(
+    zip(
+        MODES,
+        [
+            "bullet",
+            "blitz",
+            "rapid",
+            "classical",
+            "correspondence",
+            "chess960",
+            "kingOfTheHill",
+            "threeCheck",
+            "antichess",
+            "atomic",
+            "horde",
+            "racingKings",
+            "crazyhouse",
+            "puzzle",
+            "ultraBullet",
+        ],
+    )
+)
+
+
+def rating_history(
+    years: int = 10, density: float = 0.6, modes: int = ALL_MODES, seed: int = 0
+) -> list[dict]:
+    """Creates a `/api/user/{username}/rating-history` response.
+
+    Args:
+        years (int, optional): How far back the history goes. Defaults to 10.
+        density (float, optional): The chance of a point on any given day. Defaults
+            to 0.6.
+        modes (int, optional): How many modes have been played. Defaults to all.
+        seed (int, optional): The seed for the random generator. Defaults to 0.
+
+    Returns:
+        list[dict]: The rating history, in the same shape Lichess uses.
+    """
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * years)
+    history = []
+
+    for i, name in enumerate(MODES):
+        points = []
+        if i < modes:
+            rating = 1500
+            for offset in range(365 * years):
+                if rng.random() < density:
+                    rating += rng.randint(-30, 30)
+                    day = start + timedelta(days=offset)
+                    points.append([day.year, day.month - 1, day.day, rating])
+        history.append({"name": name, "points": points})
+
+    return history
+
+
+def public_data(
+    username: str = "Benchmark", seed: int = 0, history: list[dict] | None = None
+) -> dict:
+    """Creates a `/api/user/{username}` response for a player of every mode.
+
+    Args:
+        username (str, optional): The username of the player. Defaults to "Benchmark".
+        seed (int, optional): The seed for the random generator. Defaults to 0.
+        history (list[dict] | None, optional): A rating history to agree with, as
+            Lichess would, by rating each mode as of its last point. Defaults to None.
+
+    Returns:
+        dict: The profile, in the same shape Lichess uses.
+    """
+    rng = random.Random(seed)
+    perfs = {
+        mode: {
+            "games": rng.randint(0, 5000),
+            "rating": rng.randint(800, 2800),
+            "rd": rng.randint(45, 200),
+            "prog": rng.randint(-50, 50),
+        }
+        for mode in [
+            "ultraBullet",
+            "bullet",
+            "blitz",
+            "rapid",
+            "classical",
+            "correspondence",
+            "crazyhouse",
+            "chess960",
+            "kingOfTheHill",
+            "threeCheck",
+            "antichess",
+            "atomic",
+            "horde",
+            "racingKings",
+            "puzzle",
+        ]
+    }
+    perfs |= {
+        mode: {"runs": rng.randint(1, 500), "score": rng.randint(1, 100)}
+        for mode in ["storm", "racer", "streak"]
+    }
+    for mode in history or []:
+        if mode["points"]:
+            perfs[KEYS[mode["name"]]]["rating"] = mode["points"][-1][3]
+
+    return {
+        "id": username.lower(),
+        "username": username,
+        "online": True,
+        "patron": True,
+        "title": "FM",
+        "perfs": perfs,
+        "profile": {
+            "country": "NO",
+            "location": "Somewhere *with* markdown_",
+            "bio": "I play chess. " * 40,
+            "firstName": "Bench",
+            "lastName": "Mark",
+            "fideRating": 2300,
+            "links": "lichess.org\nhttps://example.com/~user\nnot a link",
+        },
+        "completionRate": 97,
+        "playTime": {"total": 3_600_000, "tv": 36_000},
+        "count": {"win": 9000, "loss": 8000, "draw": 1000},
+    }
+
+
+OPENINGS = [
+    "Sicilian Defense: Najdorf Variation",
+    "Sicilian Defense: Alapin Variation",
+    "French Defense: Winawer Variation",
+    "Caro-Kann Defense: Advance Variation",
+    "Queen's Gambit Declined",
+    "Italian Game: Two Knights Defense",
+    "Ruy Lopez: Berlin Defense",
+    "King's Indian Defense: Normal Variation",
+    "English Opening: Symmetrical Variation",
+    "Scandinavian Defense",
+]
+STATUSES = ["mate", "resign", "outoftime", "draw", "stalemate", "timeout"]
+
+
+def game(username: str, rng: random.Random) -> dict:
+    """Creates a game from a `/api/games/user/{username}` export, without its moves.
+
+    Args:
+        username (str): The user who played the game.
+        rng (random.Random): The random generator to use.
+
+    Returns:
+        dict: The game, in the same shape Lichess uses.
+    """
+    speed = rng.choice(["bullet", "blitz", "blitz", "rapid", "classical"])
+    user = {"user": {"name": username, "id": username.lower()}, "rating": 1800}
+    opponent = {
+        "user": {"name": "Opponent", "id": "opponent"},
+        "rating": rng.randint(1400, 2200),
+    }
+    white, black = (user, opponent) if rng.random() < 0.5 else (opponent, user)
+    status = rng.choice(STATUSES)
+
+    game = {
+        "id": "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=8)),
+        "rated": True,
+        "variant": "standard",
+        "speed": speed,
+        "perf": speed,
+        "createdAt": 1_600_000_000_000,
+        "lastMoveAt": 1_600_000_300_000,
+        "status": status,
+        "players": {"white": white, "black": black},
+        "opening": {"eco": "B90", "name": rng.choice(OPENINGS), "ply": 10},
+    }
+    if status not in ("draw", "stalemate"):
+        game["winner"] = rng.choice(["white", "black"])
+
+    return game
@@ -0,0 +1,85 @@
+"""Times trophy scraping against the BeautifulSoup version it replaced.
+
+Scrapes every page in `fixtures/` both ways. That both find the same trophies is tested
+in `tests/test_trophies.py`. The pages are synthetic rather than saved from
+lichess.org, so the real markup is not covered. Run with
+`python benchmarks/trophies.py` from the repository root.
+"""
+import asyncio
+from pathlib import Path
+import sys
+import timeit
+from typing import AsyncIterator
+
+import bs4
+import orjson
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "jibril"))
+
+from utils.defaults import CONSTANTS  # noqa: E402
+from utils.models.lichess import _scrape  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class Response:
+    """Just enough of `aiohttp.ClientResponse` to scrape a page from memory."""
+
+    charset = "utf-8"
+
+    def __init__(self, page: bytes, chunk: int | None = None) -> None:
+        self.page = page
+        self.chunk = chunk
+        self.read = 0
+        self.content = self
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        """Yields the page in chunks, counting how much of it was read."""
+        size = self.chunk or size
+        for i in range(0, len(self.page), size):
+            self.read = min(i + size, len(self.page))
+            yield self.page[i : i + size]  # noqa: E203
+
+    async def text(self) -> str:
+        """Reads the whole page."""
+        self.read = len(self.page)
+        return self.page.decode()
+
+
+async def legacy(response: Response) -> str:
+    """Scrapes trophies as it was done before streaming."""
+    trophies = []
+    for trophy in bs4.BeautifulSoup(await response.text(), "html.parser").find_all(
+        class_="trophy"
+    ):
+        for emoji in CONSTANTS["lichess"]["emoji"]["trophy"]:
+            if emoji in trophy["class"]:
+                trophies.append(CONSTANTS["lichess"]["emoji"]["trophy"][emoji])
+                break
+
+    return orjson.dumps(trophies).decode()
+
+
+def main(number: int = 100) -> None:
+    """Prints how long each scrape takes on every fixture."""
+    for path in sorted(FIXTURES.glob("*.html")):
+        page = path.read_bytes()
+        results = {}
+
+        for name, scrape in (("legacy", legacy), ("streaming", _scrape)):
+            response = Response(page)
+            results[name] = asyncio.run(scrape(response))
+            elapsed = min(
+                timeit.repeat(
+                    lambda: asyncio.run(scrape(Response(page))), number=number, repeat=3
+                )
+            )
+            print(
+                f"{path.stem:<10} {name:<10} {elapsed / number * 1000:6.2f} ms | "
+                f"read {response.read / 1024:5.1f} of {len(page) / 1024:5.1f} KiB | "
+                f"{len(orjson.loads(results[name]))} trophies"
+            )
+
+
+if __name__ == "__main__":
+    main()
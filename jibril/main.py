@@ -1,13 +1,11 @@
 import importlib
 import os
-from typing import Sequence
+from typing import TYPE_CHECKING, Sequence
 
-from dotenv import load_dotenv
-import hikari
-import lightbulb
-
-import utils.defaults
-import utils.upload
+# render workers import this module again when they start, so anything heavy is only
+# imported once the bot is actually run
+if TYPE_CHECKING:
+    import hikari
 
 
 def main(
@@ -15,8 +13,8 @@ def main(
     *,
     modules: Sequence[str] = (),
     guilds: Sequence[int] = (),
-    status: hikari.Status = hikari.Status.IDLE,
-    activity: hikari.Activity = utils.defaults.NIGHT_OPERA,
+    status: "hikari.Status | None" = None,
+    activity: "hikari.Activity | None" = None,
 ) -> None:
     """Starts the bot.
 
@@ -32,25 +30,49 @@ def main(
         activity (hikari.Activity, optional): The activity to start the bot with.
             Defaults to utils.defaults.NIGHT_OPERA.
     """
+    import hikari
+    import lightbulb
+
+    import utils.defaults
+    import utils.http
+    import utils.metrics
+    import utils.models.lichess
+    import utils.preload
+    import utils.profiler
+    import utils.render
+    import utils.router
+    import utils.upload  # noqa: F401
+    import utils.watchdog
+
     jibril = lightbulb.BotApp(token=token, default_enabled_guilds=guilds)
 
+    utils.http.lichess.attach(jibril)
+    if utils.models.lichess.STORE is not None:
+        utils.models.lichess.STORE.attach(jibril)
+    utils.render.pool.attach(jibril)
+    utils.router.components.attach(jibril)
+    utils.preload.attach(jibril)
+    utils.metrics.server.attach(jibril)
+    utils.watchdog.watchdog.attach(jibril)
+    utils.profiler.profiler.attach(jibril)
+
     for module in modules:
         importlib.import_module(module).load(jibril)
 
     jibril.run(
-        status=status,
-        activity=activity,
+        status=status or hikari.Status.IDLE,
+        activity=activity or utils.defaults.NIGHT_OPERA,
     )
 
 
 if __name__ == "__main__":
+    import utils.defaults
+
     try:
         import uvloop
 
         uvloop.install()
     finally:
-        load_dotenv()
-
         kwargs = {
             "token": os.environ.get("DISCORD_TOKEN"),
             "modules": utils.defaults.MODULES,
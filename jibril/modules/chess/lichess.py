@@ -1,9 +1,36 @@
+import asyncio
+import math
+import re
+import time
+
+import aiohttp
 import hikari
 import lightbulb
 
-from utils.defaults import CONSTANTS
+from utils.constants import LICHESS
+from utils.defaults import env
+import utils.http
+import utils.metrics
+import utils.models.games
+from utils.models.games import LichessGameStats
 from utils.models.lichess import LichessUser
-from utils.views.lichess import LichessUserEmbed, LichessUserFormatter
+import utils.router
+from utils.views.lichess import (
+    PREFETCH,
+    LichessUserEmbed,
+    LichessUserFormatter,
+    attached,
+    games_embed,
+    ratings_table,
+)
+
+# the most users that can be compared at once
+COMPARE_LIMIT = 25
+# the most games that can be analysed at once, how long that may take in seconds, and
+# how often the progress is shown
+GAMES_LIMIT = env("LICHESS_GAMES_LIMIT", 10000)
+GAMES_TIMEOUT = env("LICHESS_GAMES_TIMEOUT", 1800.0)
+GAMES_PROGRESS = env("LICHESS_GAMES_PROGRESS", 5.0)
 
 
 @lightbulb.command("lichess", "All lichess commands")
@@ -22,11 +49,21 @@ async def profile(ctx: lightbulb.context.SlashContext) -> None:
     Args:
         ctx (lightbulb.context.Context): The command's invocation context
     """
-    user = await LichessUser.load(ctx.options.username)
+    # requests can queue behind other commands' for longer than Discord waits
+    await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE)
+
+    try:
+        user = await LichessUser.load(ctx.options.username)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        await ctx.respond(_failure(e))
+        return
+
     formatter = LichessUserFormatter(user, ctx.bot)
 
     if user.disabled:
-        await ctx.respond(await formatter.embed())
+        embed = await formatter.embed()
+        with utils.metrics.span("discord.respond"):
+            await ctx.respond(embed)
         return
 
     embed = await formatter.embed(LichessUserEmbed.bio)
@@ -38,47 +75,262 @@ async def profile(ctx: lightbulb.context.SlashContext) -> None:
     ).set_description(
         "The user's biographical and profile-related information."
     ).set_emoji(
-        hikari.Emoji.parse(CONSTANTS["lichess"]["emoji"]["other"]["profile"])
+        LICHESS.components["profile"]
     ).add_to_menu().add_option(
         "Ratings per gamemode", "rating"
     ).set_description(
         "The user's rating between various gamemodes."
     ).set_emoji(
-        hikari.Emoji.parse(CONSTANTS["lichess"]["emoji"]["other"]["stats"])
+        LICHESS.components["stats"]
     ).add_to_menu().add_option(
         "Rating history", "history"
     ).set_description(
         "The user's rating history from when they first started."
     ).set_emoji(
-        hikari.Emoji.parse(CONSTANTS["lichess"]["emoji"]["other"]["rating"])
+        LICHESS.components["rating"]
     ).add_to_menu().add_to_container()
 
-    message = await ctx.respond(embed, components=[row])
+    with utils.metrics.span("discord.respond"):
+        message = await ctx.respond(embed, components=[row])
+
+    if PREFETCH:
+        formatter.prefetch(LichessUserEmbed.rating, LichessUserEmbed.history)
+
+    session = _ProfileSession(formatter, message)
+    utils.router.components.open(
+        await message.message(), session.navigate, session.expire
+    )
+
+
+@lichess.child
+@lightbulb.option(
+    "usernames", "The usernames of the profiles, separated by spaces or commas", str
+)
+@lightbulb.command("compare", "Compare the ratings of several profiles")
+@lightbulb.implements(lightbulb.commands.SlashSubCommand)
+async def compare(ctx: lightbulb.context.SlashContext) -> None:
+    """Compares the ratings of several Lichess profiles in a table
+
+    Args:
+        ctx (lightbulb.context.Context): The command's invocation context
+    """
+    usernames = [*filter(None, re.split(r"[\s,]+", ctx.options.usernames))]
+    usernames = [*dict.fromkeys(usernames)][:COMPARE_LIMIT]
+
+    await ctx.respond(hikari.ResponseType.DEFERRED_MESSAGE_CREATE)
+
+    try:
+        users = await LichessUser.load_many(usernames)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        await ctx.respond(_failure(e))
+        return
 
-    unwrapped_message = await message.message()
+    found = {user.id_ for user in users}
 
-    with ctx.bot.stream(hikari.InteractionCreateEvent, 890).filter(
-        lambda event: (
-            isinstance(event.interaction, hikari.ComponentInteraction)
-            and event.interaction.message == unwrapped_message
-            # uncomment this if other people's interactions become problematic
-            # and event.interaction.user == ctx.author
+    await ctx.respond(
+        ratings_table(users, [name for name in usernames if name.lower() not in found])
+    )
+
+
+@lichess.child
+@lightbulb.option(
+    "games", "How many of the most recent games to analyse", int, default=1000
+)
+@lightbulb.option("username", "The username of the profile to analyse", str)
+@lightbulb.command("games", "Analyse the results and openings of a profile's games")
+@lightbulb.implements(lightbulb.commands.SlashSubCommand)
+async def games(ctx: lightbulb.context.SlashContext) -> None:
+    """Analyses a Lichess profile's games as they are exported, showing the progress
+
+    Args:
+        ctx (lightbulb.context.Context): The command's invocation context
+    """
+    limit = min(max(ctx.options.games, 1), GAMES_LIMIT)
+    stats = LichessGameStats(ctx.options.username)
+
+    row = ctx.bot.rest.build_action_row()
+    row.add_button(hikari.ButtonStyle.DANGER, "stop").set_label(
+        "Stop"
+    ).add_to_container()
+
+    response = await ctx.respond(
+        games_embed(stats, "Waiting for the games to be exported…"), components=[row]
+    )
+    message = await response.message()
+
+    # the export gives way to commands that are waiting on a single profile
+    with utils.http.priority(utils.http.Priority.background):
+        analysis = asyncio.create_task(_analyse(ctx.bot, message, stats, limit))
+
+    async def stop(interaction: hikari.ComponentInteraction) -> None:
+        if interaction.user.id != ctx.author.id:
+            await interaction.create_initial_response(
+                hikari.ResponseType.MESSAGE_CREATE,
+                "Only whoever started the analysis can stop it.",
+                flags=hikari.MessageFlag.EPHEMERAL,
+            )
+            return
+
+        analysis.cancel()
+        await interaction.create_initial_response(
+            hikari.ResponseType.DEFERRED_MESSAGE_UPDATE
         )
-    ) as stream:
-        async for event in stream:
-            embed = await formatter.embed(LichessUserEmbed(event.interaction.values[0]))
 
+    async def expire() -> None:
+        analysis.cancel()
+
+    # the session only times out if the analysis takes too long
+    utils.router.components.open(message, stop, expire, GAMES_TIMEOUT)
+    try:
+        await asyncio.wait([analysis])
+    finally:
+        utils.router.components.close(message)
+
+    if analysis.cancelled():
+        status = f"Stopped after {stats.games} games."
+    elif isinstance(
+        error := analysis.exception(), (aiohttp.ClientError, asyncio.TimeoutError)
+    ):
+        status = _failure(error)
+    elif error is not None:
+        raise error
+    else:
+        status = f"Analysed {stats.games} games."
+
+    # the interaction may have expired by now, but the message can still be edited
+    await ctx.bot.rest.edit_message(
+        message.channel_id, message, games_embed(stats, status), components=[]
+    )
+
+
+def _failure(error: aiohttp.ClientError | asyncio.TimeoutError) -> str:
+    """Explains why Lichess could not be loaded from.
+
+    Args:
+        error (aiohttp.ClientError | asyncio.TimeoutError): What went wrong.
+
+    Returns:
+        str: The explanation, to respond with.
+    """
+    if isinstance(error, aiohttp.ClientResponseError) and error.status == 404:
+        return "User not found."
+
+    if isinstance(error, utils.http.RateLimited):
+        if backoff := utils.http.lichess.limiter.stats()["backoff"]:
+            return f"Lichess is rate limiting us, try again in {math.ceil(backoff)} s."
+        # refused rather than backed off, so the queue only needs a moment to clear
+        return "Lichess is rate limiting us, try again in a few seconds."
+
+    return "Lichess could not be reached right now, try again later."
+
+
+async def _analyse(
+    bot: lightbulb.BotApp, message: hikari.Message, stats: LichessGameStats, limit: int
+) -> None:
+    """Counts a user's games as they are exported, editing in the progress.
+
+    Args:
+        bot (lightbulb.BotApp): The bot to edit the message with.
+        message (hikari.Message): The message to show the progress in.
+        stats (LichessGameStats): Where the games are counted.
+        limit (int): The most games to count.
+    """
+    shown = time.monotonic()
+
+    async for game in utils.models.games.export(stats.username, limit=limit):
+        stats.add(game)
+
+        if time.monotonic() - shown >= GAMES_PROGRESS:
+            await bot.rest.edit_message(
+                message.channel_id,
+                message,
+                games_embed(stats, f"Analysed {stats.games} of up to {limit} games…"),
+            )
+            shown = time.monotonic()
+
+
+class _ProfileSession:
+    __slots__ = ("formatter", "message", "attachment")
+
+    def __init__(
+        self, formatter: LichessUserFormatter, message: lightbulb.ResponseProxy
+    ) -> None:
+        self.formatter = formatter
+        self.message = message
+        # whether the message currently has a graph attached to it
+        self.attachment = False
+
+    async def navigate(self, interaction: hikari.ComponentInteraction) -> None:
+        # check interaction.user here if other people's interactions become problematic
+        form = LichessUserEmbed(interaction.values[0])
+
+        if form is LichessUserEmbed.history or self.attachment:
+            self.attachment = await _navigate(interaction, self.formatter, form)
+            return
+
+        embed = await self.formatter.embed(form)
+
+        with utils.metrics.span("discord.respond"):
             try:
-                await event.interaction.create_initial_response(
+                await interaction.create_initial_response(
                     hikari.ResponseType.MESSAGE_UPDATE,
                     embed=embed,
                 )
             except hikari.NotFoundError:
-                await event.interaction.edit_initial_response(
+                await interaction.edit_initial_response(
                     embed=embed,
                 )
 
-    await message.edit(components=[])
+    async def expire(self) -> None:
+        self.formatter.close()
+        await self.message.edit(components=[])
+
+
+async def _navigate(
+    interaction: hikari.ComponentInteraction,
+    formatter: LichessUserFormatter,
+    form: LichessUserEmbed,
+) -> bool:
+    """Updates a profile message with an embed that may have a file attached.
+
+    Files can only be attached by editing a response, so the update is deferred first,
+    which also gives the graph as long as it needs to render. Any previous attachment is
+    removed, so that it does not linger below the new embed.
+
+    Args:
+        interaction (hikari.ComponentInteraction): The interaction to respond to.
+        formatter (LichessUserFormatter): The formatter of the profile.
+        form (LichessUserEmbed): The embed to navigate to.
+
+    Returns:
+        bool: Whether the message now has a file attached.
+    """
+    with utils.metrics.span("discord.respond"):
+        await interaction.create_initial_response(
+            hikari.ResponseType.DEFERRED_MESSAGE_UPDATE
+        )
+
+    embed = await formatter.embed(form)
+
+    try:
+        with utils.metrics.span("discord.edit"):
+            await interaction.edit_initial_response(
+                embed=embed, replace_attachments=True
+            )
+    except hikari.NotFoundError:
+        raise
+    except hikari.ClientHTTPResponseError:
+        if not attached(embed):
+            raise
+
+        # e.g. the file is too large to attach, so it is linked from the upload channel
+        embed = await formatter.embed(form, attach=False)
+        with utils.metrics.span("discord.edit"):
+            await interaction.edit_initial_response(
+                embed=embed, replace_attachments=True
+            )
+
+    return attached(embed)
 
 
 def _load(bot: lightbulb.BotApp) -> None:
@@ -0,0 +1,12 @@
+import lightbulb
+
+from . import profiling
+
+
+def load(bot: lightbulb.BotApp) -> None:
+    """Loads the module
+
+    Args:
+        bot (lightbulb.BotApp): The bot to load the module into
+    """
+    profiling._load(bot)
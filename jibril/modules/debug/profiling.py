@@ -0,0 +1,50 @@
+import hikari
+import lightbulb
+
+from utils.profiler import ProfilerBusy, profiler
+
+# the longest a profile can run for, in seconds
+PROFILE_LIMIT = 300
+
+
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.command("debug", "Commands for the bot's owner")
+@lightbulb.implements(lightbulb.commands.SlashCommandGroup)
+async def debug() -> None:
+    """Commands for the bot's owner"""
+
+
+# checks on a group are not inherited by its subcommands, so this needs its own
+@debug.child
+@lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.option("seconds", "How long to profile for", int, default=30)
+@lightbulb.command("profile", "Profile the bot, and send the folded stacks")
+@lightbulb.implements(lightbulb.commands.SlashSubCommand)
+async def profile(ctx: lightbulb.context.SlashContext) -> None:
+    """Profiles the bot for a while, and sends the result as a file
+
+    Args:
+        ctx (lightbulb.context.Context): The command's invocation context
+    """
+    seconds = min(max(ctx.options.seconds, 1), PROFILE_LIMIT)
+
+    await ctx.respond(
+        hikari.ResponseType.DEFERRED_MESSAGE_CREATE, flags=hikari.MessageFlag.EPHEMERAL
+    )
+
+    try:
+        path = await profiler.profile(seconds)
+    except ProfilerBusy as e:
+        await ctx.respond(str(e), flags=hikari.MessageFlag.EPHEMERAL)
+        return
+
+    await ctx.respond(
+        f"Profiled for {seconds} seconds. Open the stacks with `flamegraph.pl` or "
+        + "speedscope.",
+        attachment=hikari.File(path),
+        flags=hikari.MessageFlag.EPHEMERAL,
+    )
+
+
+def _load(bot: lightbulb.BotApp) -> None:
+    bot.command(debug)
@@ -0,0 +1,144 @@
+import asyncio
+from collections import OrderedDict
+import time
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """A size-limited LRU cache whose entries expire after a fixed time."""
+
+    __slots__ = ("maxsize", "ttl", "hits", "misses", "_entries")
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Gets an entry from the cache, marking it as recently used.
+
+        Args:
+            key (K): The key of the entry.
+            default (V | None, optional): The value to return if the entry is missing
+                or has expired. Defaults to None.
+
+        Returns:
+            V | None: The cached value, if any.
+        """
+        try:
+            expiry, value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expiry <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K) -> V | None:
+        """Gets an entry without marking it as used, or counting a hit or a miss.
+
+        Args:
+            key (K): The key of the entry.
+
+        Returns:
+            V | None: The cached value, if any.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Adds an entry to the cache, evicting the least recently used if it is full.
+
+        Args:
+            key (K): The key of the entry.
+            value (V): The value to cache.
+            ttl (float | None, optional): How long the entry stays valid, in seconds.
+                Defaults to the cache's TTL.
+        """
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Removes an entry from the cache.
+
+        Args:
+            key (K): The key of the entry.
+
+        Returns:
+            V | None: The value that was removed, if any.
+        """
+        entry = self._entries.pop(key, None)
+        return entry and entry[1]
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Reports how well the cache is doing.
+
+        Returns:
+            dict[str, int]: The number of hits, misses, and entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces concurrent calls with the same key into a single call.
+
+    Callers that arrive while a call is still running wait for its result instead of
+    starting their own. Cancelling one caller does not cancel the call for the rest.
+    """
+
+    __slots__ = ("_calls",)
+
+    def __init__(self) -> None:
+        self._calls: dict[K, asyncio.Future[V]] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._calls
+
+    async def run(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        """Runs a call, or joins the one that is already running for the key.
+
+        Args:
+            key (K): The key identifying the call.
+            factory (Callable[[], Awaitable[V]]): Starts the call if none is running.
+
+        Returns:
+            V: The result of the call.
+        """
+        if (call := self._calls.get(key)) is None:
+            call = asyncio.ensure_future(factory())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._forget(key, call))
+
+        return await asyncio.shield(call)
+
+    def cancel(self) -> None:
+        """Cancels every running call, along with everyone waiting on them."""
+        for call in [*self._calls.values()]:
+            call.cancel()
+
+    def _forget(self, key: K, call: asyncio.Future[V]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
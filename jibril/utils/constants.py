@@ -0,0 +1,84 @@
+import ast
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+import hikari
+
+from utils.defaults import CONSTANTS
+
+
+@dataclass(frozen=True, slots=True)
+class LineStyle:
+    """How a mode is plotted, as arguments to matplotlib."""
+
+    color: str
+    linestyle: str | tuple
+
+
+@dataclass(frozen=True, slots=True)
+class LichessConstants:
+    """Everything in `constants.json` for Lichess, parsed once when it is loaded."""
+
+    logo: str
+    # emojis as text, by name
+    other: Mapping[str, str]
+    modes: Mapping[str, str]
+    flags: Mapping[str, str]
+    # emojis for select menus and buttons, by name
+    components: Mapping[str, hikari.Emoji]
+    # the status emoji, by whether the user is a patron and whether they are online
+    status: Mapping[tuple[bool, bool], str]
+    # trophy classes, to their precedence and emoji
+    trophies: Mapping[str, tuple[int, str]]
+    styles: Mapping[str, LineStyle]
+
+    @classmethod
+    def load(cls, constants: dict) -> "LichessConstants":
+        """Parses the Lichess constants.
+
+        Args:
+            constants (dict): The "lichess" section of `constants.json`.
+
+        Returns:
+            LichessConstants: The parsed constants.
+        """
+        emoji = constants["emoji"]
+
+        return cls(
+            logo=constants["assets"]["logo"],
+            other=MappingProxyType(dict(emoji["other"])),
+            modes=MappingProxyType(dict(emoji["modes"])),
+            flags=MappingProxyType(dict(emoji["flags"])),
+            components=MappingProxyType(
+                {
+                    name: hikari.Emoji.parse(text)
+                    for name, text in emoji["other"].items()
+                }
+            ),
+            status=MappingProxyType(
+                {
+                    (patron, online): emoji["status"][group][state]
+                    for patron, group in ((True, "patron"), (False, "normie"))
+                    for online, state in ((True, "online"), (False, "offline"))
+                }
+            ),
+            trophies=MappingProxyType(
+                {
+                    name: (precedence, text)
+                    for precedence, (name, text) in enumerate(emoji["trophy"].items())
+                }
+            ),
+            styles=MappingProxyType(
+                {
+                    mode: LineStyle(
+                        ast.literal_eval(style["color"]),
+                        ast.literal_eval(style["linestyle"]),
+                    )
+                    for mode, style in constants["mpl"].items()
+                }
+            ),
+        )
+
+
+LICHESS = LichessConstants.load(CONSTANTS["lichess"])
@@ -1,9 +1,16 @@
+import os
 from pathlib import Path
+from typing import TypeVar
 
+from dotenv import load_dotenv
 import hikari
-import matplotlib
 import orjson
 
+T = TypeVar("T")
+
+# loaded before anything else reads its settings from the environment
+load_dotenv()
+
 MODULES = [
     f"modules.{path.parts[-1]}"
     for path in (Path(__file__).parent.parent / "modules").glob("*/")
@@ -14,11 +21,24 @@ NIGHT_OPERA = hikari.Activity(
 with open(Path(__file__).parent / "constants.json", "rb") as file:
     CONSTANTS = orjson.loads(file.read())
 
-MPL_COLOR = "white"
 
-matplotlib.rcParams["text.color"] = MPL_COLOR
-matplotlib.rcParams["axes.edgecolor"] = MPL_COLOR
-matplotlib.rcParams["axes.labelcolor"] = MPL_COLOR
-matplotlib.rcParams["xtick.color"] = MPL_COLOR
-matplotlib.rcParams["ytick.color"] = MPL_COLOR
-matplotlib.rcParams["legend.framealpha"] = 0
+def env(name: str, default: T) -> T:
+    """Reads a setting from the environment, falling back to a default.
+
+    The value is cast to the type of the default.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (T): The value to use if the variable is not set.
+
+    Returns:
+        T: The value of the setting.
+    """
+    if name not in os.environ:
+        return default
+
+    value = os.environ[name]
+
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
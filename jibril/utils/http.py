@@ -0,0 +1,312 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, Iterator
+
+import aiohttp
+import hikari
+import lightbulb
+
+from utils.defaults import env
+import utils.metrics
+
+
+class Priority(IntEnum):
+    """How urgently a request is needed. Lower values are sent first."""
+
+    interactive = 0
+    background = 1
+
+
+_PRIORITY: ContextVar[Priority] = ContextVar("priority", default=Priority.interactive)
+
+
+@contextmanager
+def priority(level: Priority) -> Iterator[None]:
+    """Sets the priority of every request made within the block.
+
+    Tasks that are created within the block keep the priority, even after it exits.
+
+    Args:
+        level (Priority): The priority to make requests with.
+    """
+    token = _PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class RateLimited(aiohttp.ClientError):
+    """Raised when a host has rate limited requests, and is being backed off from."""
+
+
+class RateLimiter:
+    """Spaces out requests with a token bucket, and backs off after a 429.
+
+    Requests wait in a queue until a token is free, highest priority first. An
+    interactive request whose turn is more than `max_wait` seconds away fails straight
+    away instead of queueing, as does every request while backing off, since a caller
+    is better served by stale data than by a response a minute later. Background
+    requests wait as long as it takes.
+    """
+
+    __slots__ = (
+        "rate",
+        "burst",
+        "backoff",
+        "max_wait",
+        "_tokens",
+        "_updated",
+        "_until",
+        "_waiters",
+        "_order",
+        "_timer",
+        "_requests",
+        "_limited",
+        "_refused",
+        "_waited",
+        "_longest",
+    )
+
+    def __init__(
+        self, rate: float, burst: int, backoff: float, max_wait: float
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._until = 0.0
+        self._waiters: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._requests = 0
+        self._limited = 0
+        self._refused = 0
+        self._waited = 0.0
+        self._longest = 0.0
+
+    async def acquire(self, level: Priority = Priority.interactive) -> None:
+        """Waits until a request can be sent.
+
+        Args:
+            level (Priority, optional): The priority of the request. Defaults to
+                Priority.interactive.
+
+        Raises:
+            RateLimited: The host is being backed off from, or an interactive request
+                would have to wait longer than `max_wait` for its turn.
+        """
+        start = time.monotonic()
+
+        if start < self._until:
+            raise RateLimited(f"Backing off for {self._until - start:.0f} seconds.")
+
+        self._refill(start)
+
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            if level is Priority.interactive:
+                # nothing can be queued ahead of an interactive request later on
+                ahead = sum(
+                    not waiter.done() and queued <= level
+                    for queued, _, waiter in self._waiters
+                )
+                if (wait := (ahead + 1 - self._tokens) / self.rate) > self.max_wait:
+                    self._refused += 1
+                    raise RateLimited(f"Would have to wait {wait:.1f} seconds to send.")
+
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (level, next(self._order), waiter))
+            self._schedule()
+            await waiter
+
+        waited = time.monotonic() - start
+        self._requests += 1
+        self._waited += waited
+        self._longest = max(self._longest, waited)
+
+    def limit(self) -> None:
+        """Starts backing off, failing every request that is waiting."""
+        self._until = time.monotonic() + self.backoff
+        self._limited += 1
+
+        for *_, waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_exception(RateLimited("Rate limited by the host."))
+
+        self._waiters.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Reports how many requests are waiting, and how long they have waited.
+
+        Returns:
+            dict[str, float]: The queue depth of each priority, along with the number
+                of requests, the number of 429s, the number of requests that would
+                have waited too long, the mean and longest wait in seconds, and how
+                much longer requests are being backed off for.
+        """
+        queued = {f"queued_{level.name}": 0 for level in Priority}
+        for level, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[f"queued_{level.name}"] += 1
+
+        return queued | {
+            "requests": self._requests,
+            "limited": self._limited,
+            "refused": self._refused,
+            "mean_wait": self._waited / max(self._requests, 1),
+            "longest_wait": self._longest,
+            "backoff": max(self._until - time.monotonic(), 0.0),
+        }
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._waiters:
+            delay = max((1 - self._tokens) / self.rate, 0.0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self) -> None:
+        self._timer = None
+        self._refill(time.monotonic())
+
+        while self._waiters and self._tokens >= 1:
+            *_, waiter = heapq.heappop(self._waiters)
+
+            # cancelled requests give their turn to the next one
+            if not waiter.done():
+                self._tokens -= 1
+                waiter.set_result(None)
+
+        self._schedule()
+
+
+class HTTPClient:
+    """A pooled HTTP client that lives as long as the bot does.
+
+    Connections are kept alive between requests, so repeated calls to the same host
+    skip the DNS lookup and TLS handshake. Every setting can be overridden through
+    environment variables starting with the client's prefix (e.g.
+    `LICHESS_CONNECTIONS_PER_HOST`).
+
+    Requests made through `request` are also rate limited, by default to the steady
+    pace Lichess asks for, and back off for a minute after a 429. Interactive requests
+    that would wait more than `{prefix}_MAX_WAIT` seconds fail instead. The host itself
+    can be swapped out through `{prefix}_URL`, e.g. for a local stand-in in benchmarks.
+    """
+
+    __slots__ = ("prefix", "url", "limiter", "_session")
+
+    def __init__(self, prefix: str, url: str) -> None:
+        self.prefix = prefix
+        self.url = env(f"{prefix}_URL", url).rstrip("/")
+        self.limiter = RateLimiter(
+            self.setting("RATE", 2.0),
+            self.setting("BURST", 6),
+            self.setting("BACKOFF", 60.0),
+            self.setting("MAX_WAIT", 10.0),
+        )
+        self._session: aiohttp.ClientSession | None = None
+
+    def setting(self, name: str, default: int | float) -> int | float:
+        """Reads one of the client's settings from the environment.
+
+        Args:
+            name (str): The name of the setting, without the prefix.
+            default (int | float): The value to use if the setting is not set.
+
+        Returns:
+            int | float: The value of the setting.
+        """
+        return env(f"{self.prefix}_{name}", default)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The underlying session, which is created on first use.
+
+        Returns:
+            aiohttp.ClientSession: The session to make requests with.
+        """
+        if self._session is None or self._session.closed:
+            return self._connect()
+        return self._session
+
+    def _connect(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.setting("CONNECTIONS", 64),
+            limit_per_host=self.setting("CONNECTIONS_PER_HOST", 8),
+            ttl_dns_cache=self.setting("DNS_TTL", 300),
+            keepalive_timeout=self.setting("KEEPALIVE", 30.0),
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=self.setting("TIMEOUT", 15.0),
+            connect=self.setting("CONNECT_TIMEOUT", 5.0),
+            sock_read=self.setting("READ_TIMEOUT", 10.0),
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, **kwargs: object
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Makes a rate limited request, at the priority of the current context.
+
+        Args:
+            method (str): The HTTP method of the request.
+            url (str): The URL to request.
+            **kwargs (object): Passed on to `aiohttp.ClientSession.request`.
+
+        Raises:
+            RateLimited: The host responded with a 429, is being backed off from, or
+                would not be free for too long.
+
+        Yields:
+            aiohttp.ClientResponse: The response.
+        """
+        await self.limiter.acquire(_PRIORITY.get())
+
+        async with self.session.request(method, url, **kwargs) as response:
+            utils.metrics.increment(
+                "responses", host=response.url.host, status=str(response.status)
+            )
+
+            if response.status == 429:
+                self.limiter.limit()
+                raise RateLimited(f"Rate limited by {response.url.host}.")
+
+            yield response
+
+    async def start(self, _: hikari.StartingEvent | None = None) -> None:
+        """Opens the session before the bot connects to Discord."""
+        if self._session is None or self._session.closed:
+            self._connect()
+
+    async def close(self, _: hikari.StoppedEvent | None = None) -> None:
+        """Closes the session and all of its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Ties the client's lifetime to a bot's.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to attach the client to.
+        """
+        bot.subscribe(hikari.StartingEvent, self.start)
+        bot.subscribe(hikari.StoppedEvent, self.close)
+
+
+lichess = HTTPClient("LICHESS", "https://lichess.org")
+utils.metrics.gauge("lichess_http", lichess.limiter.stats)
@@ -1,22 +1,35 @@
 import re
-
-_MARKDOWN_ESCAPE_COMMON = r"^>(?:>>)?\s|\[.+\]\(.+\)"
-_MARKDOWN_STOCK_REGEX = fr"(?P<markdown>[_\\~|\*`]|{_MARKDOWN_ESCAPE_COMMON})"
-
-
-def _escape_markdown(text: str) -> str:
-    def _replacement(match: re.Match) -> str:
-        groupdict = match.groupdict()
-        is_url = groupdict.get("url")
-        if is_url:
-            return is_url
-        return "\\" + groupdict["markdown"]
-
-    return re.sub(_MARKDOWN_STOCK_REGEX, _replacement, text, 0, re.MULTILINE)
-
-
-def _escape_mentions(text: str) -> str:
-    return re.sub(r"@(everyone|here|[!&]?[0-9]{17,20})", "@\u200b\\1", text)
+from urllib.parse import quote
+
+# markdown and mentions are escaped in a single pass. links are matched whole, so the
+# markdown inside them is left alone, but the mentions inside them still are not
+_ESCAPE = re.compile(
+    r"(?P<markdown>[_\\~|*`]|^>(?:>>)?\s|\[.+\]\(.+\))"
+    r"|@(?P<mention>everyone|here|[!&]?[0-9]{17,20})",
+    re.MULTILINE,
+)
+_MENTION = re.compile(r"@(everyone|here|[!&]?[0-9]{17,20})")
+
+# text without any of these has nothing to escape
+_SPECIAL = frozenset("_\\~|*`>[@")
+
+# masked links end at the first unescaped bracket, so the text of one escapes every
+# bracket on its own, rather than whole links
+_LINK_ESCAPE = re.compile(
+    r"(?P<markdown>[_\\~|*`\[\]]|^>(?:>>)?\s)"
+    r"|@(?P<mention>everyone|here|[!&]?[0-9]{17,20})",
+    re.MULTILINE,
+)
+_LINK_SPECIAL = _SPECIAL | {"]"}
+_LINK_URL_SAFE = ":/?#@!$&'*+,;=%~[]"
+
+
+def _replace(match: re.Match) -> str:
+    if (markdown := match["markdown"]) is None:
+        return "@\u200b" + match["mention"]
+    if len(markdown) > 1 and markdown[0] == "[":
+        return "\\" + _MENTION.sub("@\u200b\\1", markdown)
+    return "\\" + markdown
 
 
 def escape(text: str | None) -> str:
@@ -28,4 +41,21 @@ def escape(text: str | None) -> str:
     Returns:
         str: The sanitized string
     """
-    return _escape_markdown(_escape_mentions(text or ""))
+    if not text or _SPECIAL.isdisjoint(text):
+        return text or ""
+    return _ESCAPE.sub(_replace, text)
+
+
+def link(text: str, url: str) -> str:
+    """Creates a masked link that shows user-supplied text as is
+
+    Args:
+        text (str): The text of the link, which is escaped
+        url (str): Where the link goes, which is percent-encoded where needed
+
+    Returns:
+        str: The masked link
+    """
+    if text and not _LINK_SPECIAL.isdisjoint(text):
+        text = _LINK_ESCAPE.sub(_replace, text)
+    return f"[{text}]({quote(url, safe=_LINK_URL_SAFE)})"
@@ -0,0 +1,244 @@
+import asyncio
+from bisect import bisect_left
+from contextlib import nullcontext
+import time
+from types import TracebackType
+from typing import Callable, ContextManager, Mapping
+
+import hikari
+import lightbulb
+
+from utils.defaults import env
+
+# everything below is a no-op unless the endpoint is enabled
+PORT = env("METRICS_PORT", 0)
+ENABLED = bool(PORT)
+
+# upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, the way Prometheus expects."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Records an observation.
+
+        Args:
+            value (float): The observed value, in seconds.
+        """
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    """Times a stage, and counts the errors it raises."""
+
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        kind: type[BaseException] | None,
+        error: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        observe(self.stage, time.perf_counter() - self._start)
+
+        if kind is not None and not issubclass(kind, asyncio.CancelledError):
+            increment("errors", stage=self.stage, error=kind.__name__)
+
+
+_STAGES: dict[str, Histogram] = {}
+_COUNTERS: dict[tuple[str, tuple[tuple[str, str], ...]], int] = {}
+_GAUGES: dict[str, Callable[[], Mapping[str, object]]] = {}
+
+
+def span(stage: str) -> ContextManager:
+    """Times everything within the block as a stage.
+
+    Args:
+        stage (str): The name of the stage, e.g. `lichess.profile`.
+
+    Returns:
+        ContextManager: The span, or a shared no-op if metrics are disabled.
+    """
+    if not ENABLED:
+        return _NOOP
+    return Span(stage)
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Records how long a stage took.
+
+    Args:
+        stage (str): The name of the stage.
+        seconds (float): How long it took.
+    """
+    if (histogram := _STAGES.get(stage)) is None:
+        histogram = _STAGES[stage] = Histogram()
+    histogram.observe(seconds)
+
+
+def increment(name: str, amount: int = 1, **labels: str) -> None:
+    """Adds to a counter.
+
+    Args:
+        name (str): The name of the counter, e.g. `errors`.
+        amount (int, optional): How much to add. Defaults to 1.
+        **labels (str): What the count is broken down by.
+    """
+    if ENABLED:
+        key = name, tuple(sorted(labels.items()))
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + amount
+
+
+def gauge(name: str, collect: Callable[[], Mapping[str, object]]) -> None:
+    """Registers statistics that are read whenever metrics are scraped.
+
+    Args:
+        name (str): The name of the gauge, e.g. `lichess_cache`.
+        collect (Callable[[], Mapping[str, object]]): Returns the current values by
+            name, or mappings of them, e.g. one per cache.
+    """
+    _GAUGES[name] = collect
+
+
+def _labels(labels: Mapping[str, object]) -> str:
+    if not labels:
+        return ""
+
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def _gauge_lines(
+    name: str, values: Mapping[str, object], labels: dict[str, object]
+) -> list[str]:
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, Mapping):
+            lines += _gauge_lines(name, value, labels | {"group": key})
+        elif isinstance(value, (int, float)):
+            lines.append(f"{name}{_labels(labels | {'stat': key})} {float(value)}")
+    return lines
+
+
+def render() -> str:
+    """Formats every metric in the Prometheus text format.
+
+    Returns:
+        str: The metrics.
+    """
+    lines = ["# TYPE jibril_stage_seconds histogram"]
+    for stage, histogram in sorted(_STAGES.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            labels = _labels({"stage": stage, "le": bound})
+            lines.append(f"jibril_stage_seconds_bucket{labels} {cumulative}")
+
+        labels = _labels({"stage": stage})
+        lines.append(f"jibril_stage_seconds_sum{labels} {histogram.sum}")
+        lines.append(f"jibril_stage_seconds_count{labels} {histogram.count}")
+
+    for name in sorted({name for name, _ in _COUNTERS}):
+        lines.append(f"# TYPE jibril_{name}_total counter")
+        lines += (
+            f"jibril_{counter}_total{_labels(dict(labels))} {value}"
+            for (counter, labels), value in sorted(_COUNTERS.items())
+            if counter == name
+        )
+
+    for name, collect in sorted(_GAUGES.items()):
+        lines.append(f"# TYPE jibril_{name} gauge")
+        lines += _gauge_lines(f"jibril_{name}", collect(), {})
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves `/metrics` locally, and samples how late the event loop runs callbacks.
+
+    Only runs if `METRICS_PORT` is set, on `METRICS_HOST` (by default only to the
+    local machine). Loop lag is sampled every `METRICS_LAG_INTERVAL` seconds, as the
+    `loop.lag` stage.
+    """
+
+    __slots__ = ("_runner", "_sampler")
+
+    def __init__(self) -> None:
+        self._runner = None
+        self._sampler: asyncio.Task | None = None
+
+    async def _sample(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            observe("loop.lag", max(loop.time() - start - interval, 0.0))
+
+    async def start(self, _: hikari.StartedEvent | None = None) -> None:
+        """Starts serving metrics, if they are enabled."""
+        if not ENABLED or self._runner is not None:
+            return
+
+        # only needed once metrics are enabled, so it is not imported at startup
+        from aiohttp import web
+
+        async def metrics(_: web.Request) -> web.Response:
+            return web.Response(text=render(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, env("METRICS_HOST", "127.0.0.1"), PORT).start()
+
+        self._sampler = asyncio.create_task(
+            self._sample(env("METRICS_LAG_INTERVAL", 0.5))
+        )
+
+    async def close(self, _: hikari.StoppingEvent | None = None) -> None:
+        """Stops serving metrics."""
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Ties the server's lifetime to a bot's.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to attach the server to.
+        """
+        bot.subscribe(hikari.StartedEvent, self.start)
+        bot.subscribe(hikari.StoppingEvent, self.close)
+
+
+server = MetricsServer()
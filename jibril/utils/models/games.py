@@ -0,0 +1,157 @@
+import asyncio
+from typing import AsyncIterator
+
+import aiohttp
+import orjson
+
+from utils.defaults import env
+import utils.http
+import utils.metrics
+
+# the outcomes of a game, in the order they are counted in
+RESULTS = ("win", "draw", "loss")
+SPEEDS = ("ultraBullet", "bullet", "blitz", "rapid", "classical", "correspondence")
+
+# lichess only allows one export per client at a time, and streams it at its own pace
+_EXPORTS = asyncio.Semaphore(env("LICHESS_EXPORT_CONCURRENCY", 1))
+_EXPORT_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5.0, sock_read=60.0)
+# games that never started have no result to count
+_UNPLAYED = frozenset(("created", "started", "aborted", "noStart"))
+
+
+class LichessGameStats:
+    """Running totals over a user's games, which are folded in one at a time.
+
+    No game is kept once it has been counted. Results are counted into fixed-size
+    arrays of wins, draws and losses, by color and by time control. Openings are counted
+    by family (e.g. "Sicilian Defense"), so there are only ever as many as Lichess
+    names, however many games there are.
+
+    Args:
+        username (str): The user whose games are being counted.
+    """
+
+    __slots__ = (
+        "username",
+        "games",
+        "skipped",
+        "colors",
+        "speeds",
+        "openings",
+        "endings",
+        "_opponents",
+        "_opponent_ratings",
+    )
+
+    def __init__(self, username: str) -> None:
+        self.username = username
+        self.games = 0
+        self.skipped = 0
+        self.colors = {"white": [0, 0, 0], "black": [0, 0, 0]}
+        self.speeds = {speed: [0, 0, 0] for speed in SPEEDS}
+        self.openings: dict[str, list[int]] = {}
+        self.endings: dict[str, int] = {}
+        self._opponents = 0
+        self._opponent_ratings = 0
+
+    @property
+    def opponent_rating(self) -> int | None:
+        """The mean rating of the user's opponents, if any were rated"""
+        if not self._opponents:
+            return None
+        return round(self._opponent_ratings / self._opponents)
+
+    def add(self, game: dict) -> None:
+        """Counts a game.
+
+        Args:
+            game (dict): A game from `/api/games/user/{username}`.
+        """
+        if game.get("status") in _UNPLAYED or "players" not in game:
+            self.skipped += 1
+            return
+
+        players = game["players"]
+        color = (
+            "white"
+            if players["white"].get("user", {}).get("id") == self.username.lower()
+            else "black"
+        )
+        opponent = players["black" if color == "white" else "white"]
+
+        if (winner := game.get("winner")) is None:
+            result = 1
+        else:
+            result = 0 if winner == color else 2
+
+        self.games += 1
+        self.colors[color][result] += 1
+
+        if (speed := self.speeds.get(game.get("speed"))) is not None:
+            speed[result] += 1
+
+        if (opening := game.get("opening")) is not None:
+            family = opening["name"].partition(":")[0]
+            self.openings.setdefault(family, [0, 0, 0])[result] += 1
+
+        status = game.get("status", "unknown")
+        self.endings[status] = self.endings.get(status, 0) + 1
+
+        if (rating := opponent.get("rating")) is not None:
+            self._opponents += 1
+            self._opponent_ratings += rating
+
+    def top_openings(self, count: int) -> list[tuple[str, list[int]]]:
+        """Finds the openings that were played most.
+
+        Args:
+            count (int): How many openings to return.
+
+        Returns:
+            list[tuple[str, list[int]]]: The openings and their results, most played
+                first.
+        """
+        return sorted(self.openings.items(), key=lambda item: -sum(item[1]))[:count]
+
+
+async def export(username: str, *, limit: int | None = None) -> AsyncIterator[dict]:
+    """Streams a user's games from Lichess, most recent first.
+
+    Games are parsed one line at a time as they arrive, so memory use does not depend on
+    how many there are. Only one export runs at a time; the rest wait their turn.
+
+    Args:
+        username (str): The user whose games to export.
+        limit (int | None, optional): The most games to export. Defaults to all of
+            them.
+
+    Raises:
+        aiohttp.ClientResponseError: The user does not exist, or Lichess failed.
+
+    Yields:
+        dict: Each game, without its moves.
+    """
+    params = {
+        "moves": "false",
+        "tags": "false",
+        "clocks": "false",
+        "evals": "false",
+        "opening": "true",
+    }
+    if limit is not None:
+        params["max"] = str(limit)
+
+    async with _EXPORTS:
+        async with utils.http.lichess.request(
+            "GET",
+            f"{utils.http.lichess.url}/api/games/user/{username}",
+            params=params,
+            headers={"Accept": "application/x-ndjson"},
+            timeout=_EXPORT_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+
+            async for line in response.content:
+                if line := line.strip():
+                    utils.metrics.increment("exported_games")
+                    yield orjson.loads(line)
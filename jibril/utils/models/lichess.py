@@ -1,15 +1,28 @@
+import asyncio
+import codecs
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Mapping, TypeVar
 
 import aiohttp
-import bs4
-import numpy
 import orjson
-import pandas
 
-from utils.defaults import CONSTANTS
+from utils.cache import SingleFlight, TTLCache
+from utils.constants import LICHESS
+from utils.defaults import env
 import utils.flags
+import utils.http
+import utils.metrics
+from utils.store import Store
+
+# numpy and pandas are only imported once histories are parsed, so startup stays fast
+if TYPE_CHECKING:
+    import numpy
+    import pandas
+
+T = TypeVar("T")
 
 
 class LichessMode(Enum):
@@ -45,10 +58,144 @@ class LichessHistoryPoint:
 
 @dataclass(frozen=True, slots=True)
 class LichessHistoryData:
-    """All historical ratings for a given mode."""
+    """All historical ratings for a given mode.
+
+    Dates are stored as days since the Unix epoch, alongside the rating at the end of
+    each day. Gaps are already filled in as steps.
+    """
 
     mode: LichessMode
-    history: pandas.DataFrame
+    days: "numpy.ndarray"
+    ratings: "numpy.ndarray"
+
+    @property
+    def empty(self) -> bool:
+        """Whether the mode has no history"""
+        return not len(self.days)
+
+    @property
+    def dates(self) -> "numpy.ndarray":
+        """The days as datetimes, e.g. for plotting"""
+        return self.days.astype("datetime64[D]")
+
+    def to_series(self) -> "pandas.Series":
+        """Converts the history to a pandas series indexed by date.
+
+        Returns:
+            pandas.Series: The ratings, indexed by date.
+        """
+        import pandas
+
+        return pandas.Series(
+            self.ratings,
+            index=pandas.DatetimeIndex(self.dates.astype("datetime64[ns]")),
+        )
+
+    def extend(self, day: int, rating: int) -> "LichessHistoryData":
+        """Sets the rating at the end of a day, filling in the gap before it.
+
+        Args:
+            day (int): The day, which can be no earlier than the last day of the
+                history.
+            rating (int): The rating at the end of the day.
+
+        Returns:
+            LichessHistoryData: The history, as it would be parsed if it ended that day.
+        """
+        import numpy
+
+        last = int(self.days[-1])
+
+        if day == last:
+            ratings = self.ratings.copy()
+            ratings[-1] = rating
+            return LichessHistoryData(self.mode, self.days, ratings)
+
+        days = [day - 1, day] if day - last > 1 else [day]
+        ratings = [self.ratings[-1]] * (len(days) - 1) + [rating]
+
+        return LichessHistoryData(
+            self.mode,
+            numpy.concatenate([self.days, numpy.array(days, dtype=self.days.dtype)]),
+            numpy.concatenate(
+                [self.ratings, numpy.array(ratings, dtype=self.ratings.dtype)]
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class LichessHistorySnapshot:
+    """A rating history, along with the games and rating of each mode it agrees with.
+
+    Lichess keeps one point per mode and day, so a history loaded earlier the same day
+    can only have missed changes to today's point. Those can be read off the profile,
+    which is far cheaper to load than the history itself.
+    """
+
+    day: int
+    perfs: Mapping[LichessMode, tuple[int, int]]
+    history: list[LichessHistoryData]
+
+    @classmethod
+    def take(
+        cls, public_data: dict, history: list[LichessHistoryData], day: int
+    ) -> "LichessHistorySnapshot | None":
+        """Pairs a history with the profile that was loaded alongside it.
+
+        Args:
+            public_data (dict): The user's profile.
+            history (list[LichessHistoryData]): The user's rating history.
+            day (int): The day the history was loaded, as days since the Unix epoch.
+
+        Returns:
+            LichessHistorySnapshot | None: The snapshot, unless the last rating of a
+                mode differs between the two, e.g. because a game ended in between
+                loading them.
+        """
+        perfs = _perfs(public_data)
+        last = {data.mode: int(data.ratings[-1]) for data in history}
+
+        if any(last.get(mode, rating) != rating for mode, (_, rating) in perfs.items()):
+            return None
+        return cls(day, perfs, history)
+
+    def refresh(self, public_data: dict, day: int) -> "LichessHistorySnapshot | None":
+        """Brings the history up to date with a newer profile, without reloading it.
+
+        Args:
+            public_data (dict): The user's profile, loaded after the history was.
+            day (int): Today, as days since the Unix epoch.
+
+        Returns:
+            LichessHistorySnapshot | None: The history as a full reload would return
+                it, or None if it has to be reloaded, e.g. because a day has passed or
+                a mode was played for the first time.
+        """
+        if day != self.day:
+            return None
+
+        perfs = _perfs(public_data)
+        if perfs == self.perfs:
+            return self
+
+        modes = {data.mode for data in self.history}
+        changed = {}
+
+        for mode in perfs.keys() | self.perfs.keys():
+            if (before := self.perfs.get(mode)) == (after := perfs.get(mode)):
+                continue
+            # only new games add to a history, anything else could have rewritten it
+            if before is None or after is None or after[0] <= before[0]:
+                return None
+            if mode not in modes:
+                return None
+            changed[mode] = after[1]
+
+        history = [
+            data if data.mode not in changed else data.extend(day, changed[data.mode])
+            for data in self.history
+        ]
+        return LichessHistorySnapshot(day, perfs, history)
 
 
 @dataclass(frozen=True, slots=True)
@@ -60,6 +207,7 @@ class LichessPerfData:
     rating: int
     deviation: int | None = None
     progression: int | None = None
+    provisional: bool | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -119,82 +267,299 @@ class LichessUser:
         Returns:
             str: The emoji of the flag.
         """
-        if self.country in CONSTANTS["lichess"]["emoji"]["flags"]:
-            return CONSTANTS["lichess"]["emoji"]["flags"][self.country]
+        if (flag := LICHESS.flags.get(self.country)) is not None:
+            return flag
         return utils.flags.flag(self.country)
 
+    @staticmethod
+    async def _fetch_public_data(username: str) -> dict:
+        with utils.metrics.span("lichess.profile"):
+            return orjson.loads(
+                await _get(
+                    "profile", username, f"{utils.http.lichess.url}/api/user/{username}"
+                )
+            )
+
+    @classmethod
+    async def _fetch_history(cls, username: str) -> list[LichessHistoryData]:
+        with utils.metrics.span("lichess.history"):
+            body = await _get(
+                "history",
+                username,
+                f"{utils.http.lichess.url}/api/user/{username}/rating-history",
+            )
+
+        with utils.metrics.span("lichess.history.parse"):
+            return cls.parse_history(orjson.loads(body))
+
+    @staticmethod
+    async def _fetch_trophies(username: str) -> list[str]:
+        with utils.metrics.span("lichess.trophies"):
+            return orjson.loads(
+                await _get(
+                    "trophies",
+                    username,
+                    f"{utils.http.lichess.url}/@/{username}",
+                    _scrape,
+                )
+            )
+
     @classmethod
-    async def load(cls, username: str) -> "LichessUser":
+    async def load(
+        cls, username: str, *, concurrent: bool = True, cached: bool = True
+    ) -> "LichessUser":
         """Load a user's profile from Lichess into the wrapper class.
 
         Args:
             username (str): The username of the user to load.
+            concurrent (bool, optional): Whether to request the rating history and
+                trophies alongside the profile instead of after it. The extra requests
+                are cancelled if the account turns out to be closed. Defaults to True.
+            cached (bool, optional): Whether to reuse recently loaded data. Concurrent
+                loads of the same user share a single set of requests. Defaults to
+                True.
 
         Returns:
             LichessUser: The user that has been loaded.
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"https://lichess.org/api/user/{username}"
+        if cached and (user := USERS.get(username.lower())) is not None:
+            return user
+
+        with utils.metrics.span("lichess.load"):
+            if not cached:
+                return await cls._load(username, concurrent=concurrent, cached=False)
+
+            return await _LOADS.run(
+                username.lower(), lambda: cls._load(username, concurrent=concurrent)
+            )
+
+    @classmethod
+    async def load_many(
+        cls, usernames: Iterable[str], *, history: bool = False, cached: bool = True
+    ) -> list["LichessUser"]:
+        """Load several users at once through Lichess's bulk endpoint.
+
+        Profiles are requested up to 300 at a time, unless they are already cached.
+        Bulk profiles leave out game counts and trophies are never loaded, so users
+        that were not already cached in full are only summaries.
+
+        Args:
+            usernames (Iterable[str]): The usernames of the users to load.
+            history (bool, optional): Whether to also load rating histories, which
+                take a request each. At most `LICHESS_HISTORY_CONCURRENCY` are made at
+                once. Defaults to False, leaving `history` as None.
+            cached (bool, optional): Whether to reuse recently loaded data. Defaults
+                to True.
+
+        Returns:
+            list[LichessUser]: The users that exist, in the order they were asked
+                for. Each user is only loaded once.
+        """
+        ids = [*dict.fromkeys(username.lower() for username in usernames)]
+        users = {}
+        public_data = {}
+
+        if cached:
+            for id_ in ids:
+                if (user := USERS.get(id_)) is not None:
+                    users[id_] = user
+                elif (data := PROFILES.get(id_) or SUMMARIES.get(id_)) is not None:
+                    public_data[id_] = data
+
+        missing = [id_ for id_ in ids if id_ not in users and id_ not in public_data]
+
+        while missing:
+            batch, missing = missing[:_BATCH_SIZE], missing[_BATCH_SIZE:]
+
+            for data in await cls._fetch_many(batch):
+                public_data[data["id"]] = data
+                if cached:
+                    SUMMARIES.set(data["id"], data)
+
+        async def load(data: dict) -> "LichessUser":
+            if data.get("disabled"):
+                return cls(username=data["username"], disabled=True)
+            if not history:
+                return cls.parse(data, None, None)
+
+            # there can be many of these, so single profiles are requested first
+            with utils.http.priority(utils.http.Priority.background):
+                async with _HISTORY_FETCHES:
+                    fetched = await cls._history(data, cached=cached)
+            return cls.parse(data, fetched, None)
+
+        users.update(
+            zip(public_data, await asyncio.gather(*map(load, public_data.values())))
+        )
+
+        return [users[id_] for id_ in ids if id_ in users]
+
+    @classmethod
+    async def _history(
+        cls,
+        public_data: dict,
+        fetched: list[LichessHistoryData] | None = None,
+        *,
+        cached: bool = True,
+    ) -> list[LichessHistoryData]:
+        """Gets a user's rating history, as of a profile that was just loaded.
+
+        A history that was loaded earlier the same day is brought up to date from the
+        profile, and only downloaded again if that is not enough.
+
+        Args:
+            public_data (dict): The user's profile.
+            fetched (list[LichessHistoryData] | None, optional): The history, if it
+                was already loaded alongside the profile. Defaults to None.
+            cached (bool, optional): Whether to reuse and update recently loaded
+                histories. Defaults to True.
+
+        Returns:
+            list[LichessHistoryData]: The history of every mode the user has played.
+        """
+        id_ = public_data["id"]
+        day = _today()
+
+        if fetched is not None:
+            history = fetched
+        elif not cached:
+            return await cls._fetch_history(id_)
+        elif (snapshot := SNAPSHOTS.get(id_)) is None:
+            history = await _cached(HISTORIES, cls._fetch_history, cached)(id_)
+        elif (refreshed := snapshot.refresh(public_data, day)) is not None:
+            utils.metrics.increment("history_refreshes", result="incremental")
+            SNAPSHOTS.set(id_, refreshed)
+            HISTORIES.set(id_, refreshed.history)
+            return refreshed.history
+        else:
+            # the cached history may be just as out of date, so it is reloaded in full
+            utils.metrics.increment("history_refreshes", result="full")
+            history = await cls._fetch_history(id_)
+            HISTORIES.set(id_, history)
+
+        if cached and (taken := LichessHistorySnapshot.take(public_data, history, day)):
+            SNAPSHOTS.set(id_, taken)
+        return history
+
+    @staticmethod
+    async def _fetch_many(ids: list[str]) -> list[dict]:
+        with utils.metrics.span("lichess.users"):
+            async with utils.http.lichess.request(
+                "POST", f"{utils.http.lichess.url}/api/users", data=",".join(ids)
             ) as response:
-                public_data = orjson.loads(await response.text())
+                response.raise_for_status()
+                return orjson.loads(await response.read())
+
+    @classmethod
+    async def _load(
+        cls, username: str, *, concurrent: bool = True, cached: bool = True
+    ) -> "LichessUser":
+        fetch_public_data = _cached(PROFILES, cls._fetch_public_data, cached)
+        fetch_trophies = _cached(TROPHIES, cls._fetch_trophies, cached)
+
+        if not concurrent:
+            public_data = await fetch_public_data(username)
 
             # don't need to run anything after this if the account is disabled
             if public_data.get("disabled"):
-                return cls(
-                    username=public_data["username"],
-                    disabled=True,
-                )
+                user = cls(username=public_data["username"], disabled=True)
+            else:
+                history = await cls._history(public_data, cached=cached)
+                trophies = await fetch_trophies(username)
 
-            async with session.get(
-                f"https://lichess.org/api/user/{username}/rating-history"
-            ) as response:
-                rating_history = orjson.loads(await response.text())
-
-            async with session.get(public_data["url"]) as response:
-                # finds trophies through web scraping
-                trophies = []
-                for trophy in bs4.BeautifulSoup(
-                    await response.text(), "html.parser"
-                ).find_all(class_="trophy"):
-                    for emoji in CONSTANTS["lichess"]["emoji"]["trophy"]:
-                        if emoji in trophy["class"]:
-                            trophies.append(
-                                CONSTANTS["lichess"]["emoji"]["trophy"][emoji]
-                            )
-                            break
+                user = cls.parse(public_data, history, trophies)
+        else:
+            pending = [asyncio.create_task(fetch_trophies(username))]
+
+            # a history loaded earlier today is refreshed from the profile instead
+            if not (cached and _refreshable(username)):
+                fetch_history = _cached(HISTORIES, cls._fetch_history, cached)
+                pending.append(asyncio.create_task(fetch_history(username)))
 
-        history = []
-        for i, mode in enumerate(rating_history):
             try:
-                points = numpy.array(rating_history[i]["points"])
-                points[:, 1] += 1
-                dates = pandas.to_datetime(
-                    pandas.DataFrame(points[:, :3], columns=["year", "month", "day"])
-                )
-                ratings = pandas.Series(points[:, 3], index=dates)
-            except IndexError:
-                continue
+                public_data = await fetch_public_data(username)
+
+                if public_data.get("disabled"):
+                    user = cls(username=public_data["username"], disabled=True)
+                else:
+                    trophies, *fetched = await asyncio.gather(*pending)
+                    history = await cls._history(
+                        public_data, *fetched[:1], cached=cached
+                    )
+                    user = cls.parse(public_data, history, trophies)
+            finally:
+                # only does anything if the account is disabled or a request failed
+                for task in pending:
+                    task.cancel()
+
+        if cached:
+            USERS.set(user.id_, user)
 
-            # mode_history = pandas.DataFrame(columns=["rating", "date"])
+        return user
 
-            final_ratings = ratings.copy()
+    @staticmethod
+    def parse_history(rating_history: list[dict]) -> list[LichessHistoryData]:
+        """Parse a user's rating history into step series.
+
+        Args:
+            rating_history (list[dict]): The response of
+                `/api/user/{username}/rating-history`.
+
+        Returns:
+            list[LichessHistoryData]: The history of every mode the user has played.
+        """
+        import numpy
 
-            for j, item in enumerate(ratings.items()):
-                date, _ = item
-                if j > 0:
-                    last_date = ratings.index.values[j - 1]
+        history = []
+        for mode in rating_history:
+            if not mode["points"]:
+                continue
 
-                    if last_date != date - timedelta(days=1):
-                        final_ratings.loc[date - timedelta(days=1)] = ratings[last_date]
+            # each point is [year, month (zero-indexed), day, rating]
+            points = numpy.array(mode["points"], dtype=numpy.int32)
+            days = (
+                ((points[:, 0] - 1970) * 12 + points[:, 1])
+                .astype("datetime64[M]")
+                .astype("datetime64[D]")
+                + (points[:, 2] - 1)
+            ).astype(numpy.int32)
+            ratings = points[:, 3].astype(numpy.int16)
+
+            # holds the previous rating until the day before each gap ends, so the
+            # series plots as steps rather than interpolating between days
+            gaps = numpy.flatnonzero(numpy.diff(days) != 1)
+            days = numpy.concatenate([days, days[gaps + 1] - 1])
+            ratings = numpy.concatenate([ratings, ratings[gaps]])
+            order = numpy.argsort(days, kind="stable")
 
             history.append(
                 LichessHistoryData(
-                    LichessMode(mode["name"]),
-                    final_ratings.sort_index(),
+                    LichessMode(mode["name"]), days[order], ratings[order]
                 )
             )
 
+        return history
+
+    @classmethod
+    def parse(
+        cls,
+        public_data: dict,
+        history: list[LichessHistoryData] | None,
+        trophies: list[str] | None,
+    ) -> "LichessUser":
+        """Parse raw Lichess responses into the wrapper class.
+
+        Args:
+            public_data (dict): The response of `/api/user/{username}`, or a user from
+                `/api/users`.
+            history (list[LichessHistoryData] | None): The user's parsed rating
+                history, if it was loaded.
+            trophies (list[str] | None): The emojis of the user's trophies, if they
+                were loaded.
+
+        Returns:
+            LichessUser: The parsed user.
+        """
         perfs = []
 
         for mode in LichessMode:
@@ -209,6 +574,7 @@ class LichessUser:
                         mode,
                         deviation=performance["rd"],
                         progression=performance["prog"],
+                        provisional=performance.get("prov"),
                         **{
                             k: performance[k]
                             for k in performance.keys()
@@ -256,3 +622,212 @@ class LichessUser:
             tvtime=tvtime,
             **{k: etc[k] for k in LichessUser.__annotations__.keys() & etc.keys()},
         )
+
+
+def _today() -> int:
+    # lichess dates rating history points in UTC
+    return (datetime.now(timezone.utc).date() - date(1970, 1, 1)).days
+
+
+def _perfs(public_data: dict) -> dict[LichessMode, tuple[int, int]]:
+    # the games and rating of every mode that has a rating history
+    return {
+        LichessMode[name]: (perf["games"], perf["rating"])
+        for name, perf in public_data.get("perfs", {}).items()
+        if "games" in perf and name in LichessMode.__members__
+    }
+
+
+def _refreshable(username: str) -> bool:
+    snapshot = SNAPSHOTS.peek(username.lower())
+    return snapshot is not None and snapshot.day == _today()
+
+
+def _cached(
+    cache: TTLCache[str, T], fetch: Callable[[str], Awaitable[T]], enabled: bool
+) -> Callable[[str], Awaitable[T]]:
+    async def wrapper(username: str) -> T:
+        if enabled and (value := cache.get(username.lower())) is not None:
+            return value
+
+        value = await fetch(username)
+
+        if enabled:
+            cache.set(username.lower(), value)
+        return value
+
+    return wrapper
+
+
+class TrophyParser(HTMLParser):
+    """Finds the trophies on a Lichess profile page as it is fed.
+
+    `done` is set once the trophies have been passed, so the rest of the page does not
+    need to be parsed.
+    """
+
+    # elements that never have an end tag, so they do not nest
+    VOID = {"area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "wbr"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.trophies: list[str] = []
+        self.done = False
+        self._depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        """Collects a trophy, or notes where the trophies end."""
+        classes = next((value for name, value in attrs if name == "class"), None)
+        classes = classes.split() if classes else ()
+
+        if self._depth:
+            self._depth += tag not in self.VOID
+        elif "trophies" in classes:
+            self._depth = tag not in self.VOID
+        elif "angles" in classes:
+            # the tabs under the header, so there are no trophies on this page
+            self.done = True
+
+        if "trophy" in classes:
+            # the earliest class in the constants wins, like it always has
+            self.trophies.append(
+                min(
+                    LICHESS.trophies[name]
+                    for name in classes
+                    if name in LICHESS.trophies
+                )[1]
+            )
+
+    def handle_endtag(self, tag: str) -> None:
+        """Notes where the trophies end."""
+        if self._depth and tag not in self.VOID:
+            self._depth -= 1
+            self.done = not self._depth
+
+
+async def _scrape(response: aiohttp.ClientResponse) -> str:
+    # finds trophies through web scraping, parsing only until they have all been found
+    parser = TrophyParser()
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")("replace")
+
+    # the rest of the page is still read, or the connection could not be reused
+    async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+        if not parser.done:
+            parser.feed(decoder.decode(chunk))
+
+    if not parser.done:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+
+    return orjson.dumps(parser.trophies).decode()
+
+
+async def _get(
+    kind: str,
+    username: str,
+    url: str,
+    read: Callable[[aiohttp.ClientResponse], Awaitable[str]] = (
+        aiohttp.ClientResponse.text
+    ),
+) -> str:
+    """Gets the body of a Lichess response, going through the store if enabled.
+
+    Fresh entries are served straight from the store, while stale ones are revalidated
+    with a conditional request. If Lichess cannot be reached, stale entries are served
+    anyway.
+
+    Args:
+        kind (str): The kind of data being requested, which decides its lifetime.
+        username (str): The user the data belongs to.
+        url (str): The URL to request.
+        read (Callable[[aiohttp.ClientResponse], Awaitable[str]], optional): Reads
+            what should be stored from the response. Defaults to reading the text.
+
+    Returns:
+        str: The body of the response.
+    """
+    if STORE is None:
+        async with utils.http.lichess.request("GET", url) as response:
+            return await read(response)
+
+    key = username.lower()
+    entry = await STORE.get(kind, key)
+
+    if entry is not None and (OFFLINE or entry.age < _LIFETIMES[kind].ttl):
+        return entry.body
+    if OFFLINE:
+        raise LookupError(f"No stored {kind} for {username}")
+
+    try:
+        async with utils.http.lichess.request(
+            "GET", url, headers=entry.validators() if entry else {}
+        ) as response:
+            if entry is not None and (response.status == 304 or not response.ok):
+                if response.status == 304:
+                    await STORE.touch(kind, key)
+                return entry.body
+
+            body = await read(response)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        if entry is None:
+            raise
+        return entry.body
+
+    if response.ok:
+        await STORE.put(
+            kind,
+            key,
+            body,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    return body
+
+
+_CACHE_SIZE = env("LICHESS_CACHE_SIZE", 512)
+_CHUNK_SIZE = 16384
+
+PROFILES: TTLCache[str, dict] = TTLCache(_CACHE_SIZE, env("LICHESS_PROFILE_TTL", 120.0))
+HISTORIES: TTLCache[str, list[LichessHistoryData]] = TTLCache(
+    _CACHE_SIZE, env("LICHESS_HISTORY_TTL", 900.0)
+)
+TROPHIES: TTLCache[str, list[str]] = TTLCache(
+    _CACHE_SIZE, env("LICHESS_TROPHY_TTL", 3600.0)
+)
+# histories loaded today, which can be brought up to date from the profile alone
+SNAPSHOTS: TTLCache[str, LichessHistorySnapshot] = TTLCache(_CACHE_SIZE, 86400.0)
+# profiles from the bulk endpoint, which leave out game counts
+SUMMARIES: TTLCache[str, dict] = TTLCache(_CACHE_SIZE, PROFILES.ttl)
+# a loaded user is only as fresh as the most short-lived of its parts
+USERS: TTLCache[str, LichessUser] = TTLCache(
+    _CACHE_SIZE, min(PROFILES.ttl, HISTORIES.ttl, TROPHIES.ttl)
+)
+
+_LOADS: SingleFlight[str, LichessUser] = SingleFlight()
+_BATCH_SIZE = 300
+_HISTORY_FETCHES = asyncio.Semaphore(env("LICHESS_HISTORY_CONCURRENCY", 4))
+_LIFETIMES = {"profile": PROFILES, "history": HISTORIES, "trophies": TROPHIES}
+
+# raw responses can also be kept on disk, so that they survive restarts
+STORE = Store(path) if (path := env("LICHESS_STORE", "")) else None
+# serves everything from the store without touching the network, e.g. for tests
+OFFLINE = env("LICHESS_OFFLINE", False)
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Reports the hits, misses, and sizes of the Lichess caches.
+
+    Returns:
+        dict[str, dict[str, int]]: The statistics of each cache.
+    """
+    return {
+        "users": USERS.stats(),
+        "profiles": PROFILES.stats(),
+        "summaries": SUMMARIES.stats(),
+        "histories": HISTORIES.stats(),
+        "snapshots": SNAPSHOTS.stats(),
+        "trophies": TROPHIES.stats(),
+    }
+
+
+utils.metrics.gauge("lichess_cache", cache_stats)
@@ -0,0 +1,31 @@
+import asyncio
+import importlib
+
+import hikari
+import lightbulb
+
+from utils.defaults import env
+
+# imported lazily by whatever needs them first, which would otherwise be a command
+MODULES = ("numpy",)
+
+
+async def preload(_: hikari.StartedEvent | None = None) -> None:
+    """Imports heavy modules in a background thread, so no command has to wait on them.
+
+    Set `PRELOAD=false` to only import them once they are needed.
+    """
+    if not env("PRELOAD", True):
+        return
+
+    for module in MODULES:
+        await asyncio.to_thread(importlib.import_module, module)
+
+
+def attach(bot: lightbulb.BotApp) -> None:
+    """Preloads modules once a bot has connected.
+
+    Args:
+        bot (lightbulb.BotApp): The bot to preload modules for.
+    """
+    bot.subscribe(hikari.StartedEvent, preload)
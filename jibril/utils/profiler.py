@@ -0,0 +1,146 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+import logging
+from pathlib import Path
+import signal
+import sys
+import tempfile
+import threading
+import time
+from types import FrameType
+
+import hikari
+import lightbulb
+
+from utils.defaults import env
+
+_LOGGER = logging.getLogger("jibril.profiler")
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def sample(seconds: float, interval: float) -> Counter[str]:
+    """Samples the stacks of every other thread at a fixed interval.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): How long to wait between samples, in seconds.
+
+    Returns:
+        Counter[str]: How often each stack was seen, as semicolon-separated frames
+            from the outermost in, starting with the name of its thread.
+    """
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    current = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    end = time.monotonic() + seconds
+
+    while time.monotonic() < end:
+        for thread, frame in sys._current_frames().items():
+            if thread == current:
+                continue
+
+            frames = []
+            while frame is not None:
+                frames.append(_label(frame))
+                frame = frame.f_back
+
+            if thread not in names:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames.append(names.get(thread, str(thread)))
+
+            stacks[";".join(reversed(frames))] += 1
+
+        time.sleep(interval)
+
+    return stacks
+
+
+class Profiler:
+    """Profiles the bot on demand, by sampling the stacks of its threads.
+
+    Profiles are written as folded stacks, one stack and its count per line, which
+    `flamegraph.pl` and speedscope both read. Sampling runs in its own thread, so it
+    sees the event loop however busy it is, with or without uvloop. Graphs rendered in
+    worker processes are not sampled.
+
+    A profile can be started by the owner's `/debug profile` command, or by sending the
+    bot `SIGUSR2`, which profiles for `PROFILE_SECONDS` seconds. Profiles are written to
+    `PROFILE_DIR`, or the temporary directory if it is not set.
+    """
+
+    __slots__ = ("interval", "directory", "_lock", "_tasks")
+
+    def __init__(self, interval: float, directory: str) -> None:
+        self.interval = interval
+        self.directory = Path(directory or tempfile.gettempdir())
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def profile(self, seconds: float) -> Path:
+        """Profiles the bot, without blocking the event loop.
+
+        Args:
+            seconds (float): How long to profile for.
+
+        Raises:
+            ProfilerBusy: Another profile is already running.
+
+        Returns:
+            Path: The file the folded stacks were written to.
+        """
+        if self._lock.locked():
+            raise ProfilerBusy("The bot is already being profiled.")
+
+        async with self._lock:
+            stacks = await asyncio.to_thread(sample, seconds, self.interval)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"jibril-{datetime.now():%Y%m%d-%H%M%S}.folded"
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        )
+        return path
+
+    def _signal(self) -> None:
+        async def profile() -> None:
+            try:
+                path = await self.profile(env("PROFILE_SECONDS", 30.0))
+            except ProfilerBusy:
+                _LOGGER.warning("ignoring SIGUSR2, the bot is already being profiled")
+            else:
+                _LOGGER.warning("wrote profile to %s", path)
+
+        task = asyncio.create_task(profile())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self, _: hikari.StartedEvent | None = None) -> None:
+        """Profiles the bot whenever it receives `SIGUSR2`, where signals exist."""
+        if hasattr(signal, "SIGUSR2"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR2, self._signal)
+
+    async def stop(self, _: hikari.StoppingEvent | None = None) -> None:
+        """Stops listening for `SIGUSR2`."""
+        if hasattr(signal, "SIGUSR2"):
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR2)
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Lets a bot be profiled through signals for as long as it runs.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to profile.
+        """
+        bot.subscribe(hikari.StartedEvent, self.start)
+        bot.subscribe(hikari.StoppingEvent, self.stop)
+
+
+profiler = Profiler(env("PROFILE_INTERVAL", 0.005), env("PROFILE_DIR", ""))
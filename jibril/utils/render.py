@@ -0,0 +1,235 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import multiprocessing
+import sys
+from typing import Callable
+
+import hikari
+import lightbulb
+
+from utils.cache import TTLCache
+from utils.defaults import env
+import utils.graphs
+import utils.metrics
+
+
+class RenderUnavailable(Exception):
+    """Raised when a graph cannot be rendered in time, or too many are queued."""
+
+
+class RenderPool:
+    """Renders graphs in worker processes, so that the event loop never blocks.
+
+    Workers import matplotlib as soon as they start. At most `GRAPH_QUEUE` renders can
+    wait for a worker at once, and every render gives up after `GRAPH_TIMEOUT` seconds.
+    A worker cannot be interrupted, so a render that was given up on still counts
+    against the queue until it finishes. With `GRAPH_WORKERS=0`, graphs are rendered
+    in a single thread instead.
+    """
+
+    __slots__ = ("workers", "queue", "timeout", "_configured", "_executor", "_pending")
+
+    def __init__(self) -> None:
+        self.workers = 0
+        self.queue = 0
+        self.timeout = 0.0
+        self._configured = False
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    def _configure(self) -> None:
+        self.workers = env("GRAPH_WORKERS", 2)
+        self.queue = env("GRAPH_QUEUE", 8)
+        self.timeout = env("GRAPH_TIMEOUT", 30.0)
+        self._configured = True
+
+        if self.workers:
+            self._executor = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=utils.graphs.warm,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="render")
+
+    async def start(self, _: hikari.StartedEvent | None = None) -> None:
+        """Starts every worker, so that none of them are cold on first use."""
+        if not self._configured:
+            self._configure()
+
+        if self.workers:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._executor, utils.graphs.warm)
+                    for _ in range(self.workers)
+                )
+            )
+
+    async def close(self, _: hikari.StoppingEvent | None = None) -> None:
+        """Stops the workers, abandoning any queued renders."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._configured = False
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Ties the pool's lifetime to a bot's.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to attach the pool to.
+        """
+        bot.subscribe(hikari.StartedEvent, self.start)
+        bot.subscribe(hikari.StoppingEvent, self.close)
+
+    async def run(self, function: Callable[..., bytes], *args: object) -> bytes:
+        """Runs a rendering function in the pool.
+
+        Args:
+            function (Callable[..., bytes]): The function to run. It and its arguments
+                must be picklable.
+            *args (object): The arguments to call the function with.
+
+        Raises:
+            RenderUnavailable: Too many renders are queued, or the render took too
+                long.
+
+        Returns:
+            bytes: The rendered image.
+        """
+        if not self._configured:
+            self._configure()
+
+        if self._pending >= self.queue + max(self.workers, 1):
+            utils.metrics.increment("errors", stage="graph.render", error="busy")
+            raise RenderUnavailable("Too many graphs are being rendered.")
+
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(function, *args)
+        self._pending += 1
+        # only counted as done once the worker is free, even if it has been given up on
+        future.add_done_callback(lambda _: self._finished(loop))
+
+        try:
+            with utils.metrics.span("graph.render"):
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError as e:
+            raise RenderUnavailable("The graph took too long to render.") from e
+
+    def _finished(self, loop: asyncio.AbstractEventLoop) -> None:
+        # called from the executor's own thread
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # the loop has closed, and the pool with it
+            pass
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+
+class RenderCache:
+    """Caches rendered images, and the URLs they were uploaded to, by their content.
+
+    Keys are hashes of everything that affects the image, so an unchanged graph never
+    has to be rendered or uploaded again. Images are evicted once they take up more
+    than `maxbytes`, least recently used first.
+    """
+
+    __slots__ = ("maxbytes", "urls", "_images", "_size")
+
+    def __init__(self, maxbytes: int, url_ttl: float) -> None:
+        self.maxbytes = maxbytes
+        self.urls: TTLCache[str, str] = TTLCache(4096, url_ttl)
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def key(*parts: object) -> str:
+        """Hashes the inputs of a render.
+
+        Args:
+            *parts (object): Everything that affects the image. Arrays are hashed by
+                their contents, and lists and tuples are hashed item by item.
+
+        Returns:
+            str: The key of the render.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        # there can only be arrays to hash once numpy has been imported
+        numpy = sys.modules.get("numpy")
+
+        def update(part: object) -> None:
+            if numpy is not None and isinstance(part, numpy.ndarray):
+                digest.update(part.dtype.str.encode())
+                digest.update(part.tobytes())
+            elif isinstance(part, (list, tuple)):
+                digest.update(b"[")
+                for item in part:
+                    update(item)
+                digest.update(b"]")
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b"\0")
+
+        update(parts)
+        return digest.hexdigest()
+
+    def image(self, key: str) -> bytes | None:
+        """Gets a rendered image.
+
+        Args:
+            key (str): The key of the render.
+
+        Returns:
+            bytes | None: The image, if it is cached.
+        """
+        if (image := self._images.get(key)) is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def store(self, key: str, image: bytes) -> None:
+        """Caches a rendered image.
+
+        Args:
+            key (str): The key of the render.
+            image (bytes): The rendered image.
+        """
+        if len(image) > self.maxbytes:
+            return
+
+        if (old := self._images.pop(key, None)) is not None:
+            self._size -= len(old)
+
+        self._images[key] = image
+        self._size += len(image)
+
+        while self._size > self.maxbytes:
+            self._size -= len(self._images.popitem(last=False)[1])
+
+
+pool = RenderPool()
+cache = RenderCache(
+    env("GRAPH_CACHE_BYTES", 64 * 1024 * 1024), env("GRAPH_URL_TTL", 86400.0)
+)
+
+
+def stats() -> dict[str, object]:
+    """Reports how busy the render pool is, and how full the render cache is.
+
+    Returns:
+        dict[str, object]: The renders that are running or queued, including any that
+            were given up on, the number and total size of cached images, and the
+            statistics of the cached URLs.
+    """
+    return {
+        "pending": pool._pending,
+        "images": len(cache._images),
+        "bytes": cache._size,
+        "urls": cache.urls.stats(),
+    }
+
+
+utils.metrics.gauge("render", stats)
@@ -0,0 +1,147 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import hikari
+import lightbulb
+
+from utils.defaults import env
+
+
+@dataclass(slots=True)
+class Session:
+    """The state of a message whose components are being listened to."""
+
+    handle: Callable[[hikari.ComponentInteraction], Awaitable[None]]
+    expire: Callable[[], Awaitable[None]]
+    timeout: float
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    timer: asyncio.TimerHandle | None = None
+
+
+class ComponentRouter:
+    """Routes component interactions to the session of the message they were on.
+
+    A single listener looks sessions up by message ID, instead of every open message
+    checking every interaction. Sessions expire once they have been idle for their
+    timeout. At most `maxsize` are kept, so under pressure the least recently used are
+    expired early.
+    """
+
+    __slots__ = ("maxsize", "_sessions", "_tasks")
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._sessions: OrderedDict[hikari.Snowflake, Session] = OrderedDict()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, message: hikari.SnowflakeishOr[hikari.Message]) -> bool:
+        return hikari.Snowflake(message) in self._sessions
+
+    def open(
+        self,
+        message: hikari.SnowflakeishOr[hikari.Message],
+        handle: Callable[[hikari.ComponentInteraction], Awaitable[None]],
+        expire: Callable[[], Awaitable[None]],
+        timeout: float = 890,
+    ) -> None:
+        """Starts routing a message's component interactions.
+
+        Args:
+            message (hikari.SnowflakeishOr[hikari.Message]): The message to route.
+            handle (Callable[[hikari.ComponentInteraction], Awaitable[None]]): Called
+                with each interaction, one at a time.
+            expire (Callable[[], Awaitable[None]]): Called once the session ends.
+            timeout (float, optional): How long the session can be idle for, in
+                seconds. Defaults to 890, just under the lifetime of an interaction.
+        """
+        message = hikari.Snowflake(message)
+
+        if message in self._sessions:
+            self._end(message)
+
+        self._sessions[message] = Session(handle, expire, timeout)
+        self._schedule(message)
+
+        while len(self._sessions) > self.maxsize:
+            self._end(next(iter(self._sessions)))
+
+    def close(self, message: hikari.SnowflakeishOr[hikari.Message]) -> None:
+        """Ends a session early.
+
+        Args:
+            message (hikari.SnowflakeishOr[hikari.Message]): The message to stop
+                routing.
+        """
+        if (message := hikari.Snowflake(message)) in self._sessions:
+            self._end(message)
+
+    async def dispatch(self, event: hikari.InteractionCreateEvent) -> None:
+        """Passes a component interaction on to its session, if it has one.
+
+        Args:
+            event (hikari.InteractionCreateEvent): The event to route.
+        """
+        interaction = event.interaction
+
+        if not isinstance(interaction, hikari.ComponentInteraction):
+            return
+
+        if (session := self._sessions.get(interaction.message.id)) is None:
+            return
+
+        self._sessions.move_to_end(interaction.message.id)
+        self._schedule(interaction.message.id)
+
+        async with session.lock:
+            await session.handle(interaction)
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Routes a bot's component interactions.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to attach the router to.
+        """
+        bot.subscribe(hikari.InteractionCreateEvent, self.dispatch)
+        bot.subscribe(hikari.StoppingEvent, self.stop)
+
+    async def stop(self, _: hikari.StoppingEvent | None = None) -> None:
+        """Drops every session without expiring it."""
+        for session in self._sessions.values():
+            if session.timer is not None:
+                session.timer.cancel()
+
+        self._sessions.clear()
+
+    def _schedule(self, message: hikari.Snowflake) -> None:
+        session = self._sessions[message]
+
+        if session.timer is not None:
+            session.timer.cancel()
+
+        session.timer = asyncio.get_running_loop().call_later(
+            session.timeout, self._end, message
+        )
+
+    def _end(self, message: hikari.Snowflake) -> None:
+        session = self._sessions.pop(message)
+
+        if session.timer is not None:
+            session.timer.cancel()
+
+        # the session expires after whatever interaction it is handling
+        task = asyncio.create_task(self._expire(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _expire(session: Session) -> None:
+        async with session.lock:
+            await session.expire()
+
+
+components = ComponentRouter(env("COMPONENT_SESSIONS", 1024))
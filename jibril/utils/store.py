@@ -0,0 +1,150 @@
+import asyncio
+from dataclasses import dataclass
+import sqlite3
+import threading
+import time
+
+import hikari
+import lightbulb
+
+
+@dataclass(frozen=True, slots=True)
+class StoreEntry:
+    """A stored response body and the validators needed to revalidate it."""
+
+    body: str
+    fetched: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def age(self) -> float:
+        """How long ago the body was fetched or revalidated, in seconds"""
+        return time.time() - self.fetched
+
+    def validators(self) -> dict[str, str]:
+        """Creates the headers for a conditional request.
+
+        Returns:
+            dict[str, str]: The headers to send so the server can reply with a 304.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class Store:
+    """A SQLite-backed store for response bodies that survives restarts.
+
+    Entries are grouped by kind (e.g. `profile`) and keyed within that kind. Queries
+    run in a worker thread so they never block the event loop.
+    """
+
+    __slots__ = ("path", "_connection", "_lock")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, body TEXT NOT NULL, "
+                "fetched REAL NOT NULL, etag TEXT, last_modified TEXT, "
+                "PRIMARY KEY (kind, key))"
+            )
+        return self._connection
+
+    def _get(self, kind: str, key: str) -> StoreEntry | None:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT body, fetched, etag, last_modified FROM entries "
+                    "WHERE kind = ? AND key = ?",
+                    (kind, key),
+                )
+                .fetchone()
+            )
+        return row and StoreEntry(*row)
+
+    def _put(self, kind: str, key: str, entry: StoreEntry) -> None:
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, entry.body, entry.fetched, entry.etag, entry.last_modified),
+            )
+
+    def _touch(self, kind: str, key: str) -> None:
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "UPDATE entries SET fetched = ? WHERE kind = ? AND key = ?",
+                (time.time(), kind, key),
+            )
+
+    async def get(self, kind: str, key: str) -> StoreEntry | None:
+        """Reads an entry from the store.
+
+        Args:
+            kind (str): The kind of the entry.
+            key (str): The key of the entry.
+
+        Returns:
+            StoreEntry | None: The entry, if it exists.
+        """
+        return await asyncio.to_thread(self._get, kind, key)
+
+    async def put(
+        self,
+        kind: str,
+        key: str,
+        body: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Writes an entry to the store, replacing any existing one.
+
+        Args:
+            kind (str): The kind of the entry.
+            key (str): The key of the entry.
+            body (str): The body to store.
+            etag (str | None, optional): The `ETag` header of the response. Defaults
+                to None.
+            last_modified (str | None, optional): The `Last-Modified` header of the
+                response. Defaults to None.
+        """
+        entry = StoreEntry(body, time.time(), etag, last_modified)
+        await asyncio.to_thread(self._put, kind, key, entry)
+
+    async def touch(self, kind: str, key: str) -> None:
+        """Marks an entry as fresh, e.g. after the server replied with a 304.
+
+        Args:
+            kind (str): The kind of the entry.
+            key (str): The key of the entry.
+        """
+        await asyncio.to_thread(self._touch, kind, key)
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def close(self, _: hikari.StoppedEvent | None = None) -> None:
+        """Closes the connection to the database, once any query has finished."""
+        await asyncio.to_thread(self._close)
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Ties the store's connection to a bot's lifetime.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to attach the store to.
+        """
+        bot.subscribe(hikari.StoppedEvent, self.close)
@@ -1,14 +1,41 @@
-import os
+import asyncio
 
 import hikari
 import lightbulb
 
+from utils.defaults import env
+import utils.metrics
+
+# uploads share rate limits across every guild, so only a few are in flight at once
+_UPLOADS = asyncio.Semaphore(env("UPLOAD_CONCURRENCY", 2))
+_channel: hikari.Snowflake | None = None
+
+
+def channel() -> hikari.Snowflake:
+    """The channel that files are uploaded to.
+
+    Raises:
+        KeyError: `UPLOAD_CHANNEL` is not set.
+
+    Returns:
+        hikari.Snowflake: The ID of the channel.
+    """
+    global _channel
+
+    if _channel is None:
+        if not (channel_id := env("UPLOAD_CHANNEL", "")):
+            raise KeyError("UPLOAD_CHANNEL")
+        _channel = hikari.Snowflake(channel_id)
+
+    return _channel
+
 
 async def upload(bot: lightbulb.BotApp, file: hikari.Resourceish) -> str:
     """Uploads a file to Discord.
 
-    This is useful for uploading images that are disallowed as attachments (e.g. in an
-    embed in the first interaction response).
+    This is a fallback for when a file cannot be attached to a response directly. The
+    channel is posted to by ID, so it never has to be fetched, and at most
+    `UPLOAD_CONCURRENCY` uploads run at once; the rest wait their turn.
 
     Args:
         bot (lightbulb.BotApp): The bot to upload the file with
@@ -17,8 +44,7 @@ async def upload(bot: lightbulb.BotApp, file: hikari.Resourceish) -> str:
     Returns:
         str: The URL of the uploaded file
     """
-    chan: hikari.TextableChannel = await bot.rest.fetch_channel(
-        int(os.environ["UPLOAD_CHANNEL"])
-    )
-    msg = await chan.send(attachment=file)
+    async with _UPLOADS:
+        with utils.metrics.span("discord.upload"):
+            msg = await bot.rest.create_message(channel(), attachment=file)
     return msg.attachments[0].url
@@ -1,23 +1,47 @@
-import ast
-import copy
+import asyncio
+from dataclasses import dataclass, replace
 from enum import Enum
-import io
 
 import hikari
 from hikari.embeds import EmbedField
 import hikari.files
 import humanize
 import lightbulb
-import matplotlib
-import matplotlib.pyplot as plt
 import validators
 
-from utils.defaults import CONSTANTS, MPL_COLOR
+from utils.cache import SingleFlight
+from utils.constants import LICHESS
+from utils.defaults import env
 import utils.flags
+import utils.graphs
 import utils.markdown
+import utils.metrics
+from utils.models.games import SPEEDS, LichessGameStats
 from utils.models.lichess import LichessMode, LichessUser
+import utils.render
+from utils.render import RenderUnavailable
 from utils.upload import upload
 
+GRAPH_PROFILE = utils.graphs.PROFILES[env("GRAPH_PROFILE", "discord")]
+GRAPH_DOWNSAMPLE = env("GRAPH_DOWNSAMPLE", True)
+GRAPH_ATTACH = env("GRAPH_ATTACH", True)
+
+# prefetches share one budget, so that they never crowd out tabs someone is waiting on
+PREFETCH = env("LICHESS_PREFETCH", False)
+_PREFETCHES = asyncio.Semaphore(env("LICHESS_PREFETCH_CONCURRENCY", 2))
+
+# the modes that are compared side by side, and their column headers
+COMPARE_MODES = {
+    LichessMode.bullet: "Bullet",
+    LichessMode.blitz: "Blitz",
+    LichessMode.rapid: "Rapid",
+    LichessMode.classical: "Classical",
+    LichessMode.puzzle: "Puzzles",
+}
+
+# graphs are re-rendered whenever their styles change
+_MPL_STYLE = sorted(LICHESS.styles.items())
+
 
 class LichessUserEmbed(Enum):
     """All types of embeds for a user."""
@@ -27,15 +51,63 @@ class LichessUserEmbed(Enum):
     history = "history"
 
 
+def attached(embed: hikari.Embed) -> bool:
+    """Checks whether an embed's image has to be sent as an attachment.
+
+    Args:
+        embed (hikari.Embed): The embed to check.
+
+    Returns:
+        bool: Whether the image is a file, rather than a URL.
+    """
+    return embed.image is not None and not isinstance(
+        embed.image.resource, hikari.files.WebResource
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class EmbedSpec:
+    """A prebuilt embed, which new embeds can be made from cheaply."""
+
+    title: str
+    url: str
+    thumbnail: str
+    description: str | None = None
+    fields: tuple[EmbedField, ...] = ()
+    image: hikari.Resourceish | None = None
+
+    def build(self) -> hikari.Embed:
+        """Makes a new embed from the spec.
+
+        Returns:
+            hikari.Embed: The embed, which is safe to modify.
+        """
+        embed = hikari.Embed(
+            title=self.title, url=self.url, description=self.description
+        ).set_thumbnail(self.thumbnail)
+
+        for field in self.fields:
+            embed.add_field(field.name, field.value, inline=field.is_inline)
+
+        if self.image is not None:
+            embed.set_image(self.image)
+
+        return embed
+
+
 class LichessUserFormatter:
     """A class that helps format user data to an embed."""
 
-    __slots__ = ("bot", "user", "embeds")
+    __slots__ = ("bot", "user", "embeds", "_builds", "_prefetch")
 
     def __init__(self, user: LichessUser, bot: lightbulb.BotApp) -> None:
         self.user = user
         self.bot = bot
         self.embeds = {}
+        self._builds: SingleFlight[
+            tuple[LichessUserEmbed | None, bool], EmbedSpec
+        ] = SingleFlight()
+        self._prefetch: asyncio.Task[None] | None = None
 
     def title(self) -> str:
         """Creates the title for the user embed.
@@ -47,16 +119,9 @@ class LichessUserFormatter:
 
         # status
         if self.user.disabled:
-            state = CONSTANTS["lichess"]["emoji"]["other"]["closed"]
-        elif self.user.patron:
-            if self.user.online:
-                state = CONSTANTS["lichess"]["emoji"]["status"]["patron"]["online"]
-            else:
-                state = CONSTANTS["lichess"]["emoji"]["status"]["patron"]["offline"]
-        elif self.user.online:
-            state = CONSTANTS["lichess"]["emoji"]["status"]["normie"]["online"]
+            state = LICHESS.other["closed"]
         else:
-            state = CONSTANTS["lichess"]["emoji"]["status"]["normie"]["offline"]
+            state = LICHESS.status[bool(self.user.patron), bool(self.user.online)]
 
         sections.append(state)
 
@@ -82,10 +147,10 @@ class LichessUserFormatter:
         sections = []
 
         # trophies
-        badges = self.user.trophies or []
+        badges = [*(self.user.trophies or [])]
 
         if self.user.violation:
-            badges.append(CONSTANTS["lichess"]["emoji"]["other"]["violation"])
+            badges.append(LICHESS.other["violation"])
 
         sections.append(" ".join(badges))
 
@@ -110,35 +175,20 @@ class LichessUserFormatter:
 
         return description or "*This user has no description.*"
 
-    def base(self) -> hikari.Embed:
+    def base(self) -> EmbedSpec:
         """The base embed to use for the user embed.
 
         Returns:
-            hikari.Embed: The base embed.
+            EmbedSpec: The base embed.
         """
-        return hikari.Embed(
+        return EmbedSpec(
             title=self.title(),
             url=self.user.url,
-        ).set_thumbnail(CONSTANTS["lichess"]["assets"]["logo"])
-
-    def graph(self) -> io.BytesIO:
-        """Creates a graph of the user's rating history.
-
-        Raises:
-            ValueError: The user has no games.
-
-        Returns:
-            io.BytesIO: The bytes of the graph PNG.
-        """
-        if not self.user.total_games:
-            raise ValueError("User has no games.")
-
-        fig = plt.figure()
-        ax = fig.add_axes([0.1, 0.1, 0.7, 0.7])
+            thumbnail=LICHESS.logo,
+        )
 
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Glicko-2")
-        ax.set_title(f"{self.user.username}'s Rating History")
+    def _graph_args(self) -> tuple[str, list[utils.graphs.Series]]:
+        series = []
 
         for mode in LichessMode:
             histories = [
@@ -146,51 +196,123 @@ class LichessUserFormatter:
             ]
             if histories:
                 history_data = histories[0]
-                if not history_data.history.empty:
-                    ax.plot(
-                        history_data.history.index.values,
-                        history_data.history.values,
-                        label=history_data.mode.value,
-                        color=ast.literal_eval(
-                            CONSTANTS["lichess"]["mpl"][mode.name]["color"]
-                        ),
-                        linestyle=ast.literal_eval(
-                            CONSTANTS["lichess"]["mpl"][mode.name]["linestyle"]
-                        ),
-                        linewidth=0.75,
+                if not history_data.empty:
+                    style = LICHESS.styles[mode.name]
+                    series.append(
+                        (
+                            history_data.mode.value,
+                            history_data.days,
+                            history_data.ratings,
+                            style.color,
+                            style.linestyle,
+                        )
                     )
 
-        ax.grid(linewidth=0.25, alpha=0.25, color=MPL_COLOR)
-        ax.legend(bbox_to_anchor=(1, 1), prop={"size": 6})
+        if GRAPH_DOWNSAMPLE and series:
+            # columns are shared between modes, since they share the x axis
+            start = min(days[0] for _, days, *_ in series)
+            end = max(days[-1] for _, days, *_ in series)
+            columns = int(GRAPH_PROFILE.pixels[0] * utils.graphs.AXES[2])
+
+            series = [
+                (
+                    label,
+                    *utils.graphs.downsample(days, ratings, start, end, columns),
+                    *style,
+                )
+                for label, days, ratings, *style in series
+            ]
+
+        return f"{self.user.username}'s Rating History", series
+
+    def graph_key(self) -> str:
+        """Hashes everything that affects the graph of the user's rating history.
+
+        Returns:
+            str: The key of the graph in the render cache.
+        """
+        return self._graph_key(self._graph_args())
+
+    def _graph_key(self, args: tuple[str, list[utils.graphs.Series]]) -> str:
+        return utils.render.cache.key(
+            utils.graphs.rating_history.__qualname__,
+            utils.graphs.COLOR,
+            _MPL_STYLE,
+            GRAPH_PROFILE,
+            *args,
+        )
+
+    async def graph(self) -> bytes:
+        """Creates a graph of the user's rating history.
 
-        ax.xaxis.set_major_locator(matplotlib.dates.AutoDateLocator(maxticks=8))
+        The graph is rendered in the render pool, away from the event loop, unless an
+        identical graph has already been rendered.
 
-        graph = io.BytesIO()
+        Raises:
+            ValueError: The user has no games.
+            RenderUnavailable: The graph could not be rendered in time.
 
-        fig.savefig(graph, dpi=512, transparent=True)
+        Returns:
+            bytes: The encoded graph, in the format of `GRAPH_PROFILE`.
+        """
+        args = self._graph_args()
+        return await self._graph(args, self._graph_key(args))
 
-        graph.seek(0, 0)
+    async def _graph(
+        self, args: tuple[str, list[utils.graphs.Series]], key: str
+    ) -> bytes:
+        # the arguments and their key are worked out on the event loop, so only once
+        if not self.user.total_games:
+            raise ValueError("User has no games.")
+
+        if (graph := utils.render.cache.image(key)) is None:
+            utils.metrics.increment("graphs", result="miss")
+            graph = await utils.render.pool.run(
+                utils.graphs.rating_history, *args, GRAPH_PROFILE
+            )
+            utils.render.cache.store(key, graph)
+        else:
+            utils.metrics.increment("graphs", result="hit")
 
         return graph
 
-    async def embed(self, form: LichessUserEmbed | None = None) -> hikari.Embed:
+    async def embed(
+        self, form: LichessUserEmbed | None = None, *, attach: bool = GRAPH_ATTACH
+    ) -> hikari.Embed:
         """Creates the embed for the user.
 
         Args:
             form (LichessUserEmbed, optional): The type of embed to create.
+            attach (bool, optional): Whether the rating graph is attached as a file, or
+                uploaded to `UPLOAD_CHANNEL` and linked. Attached graphs can only be
+                sent by editing a response. Defaults to `GRAPH_ATTACH`.
 
         Returns:
             hikari.Embed: The embed to send.
         """
-        if form in self.embeds:
-            return copy.deepcopy(self.embeds[form])
+        stage = f"embed.{form.name if form else 'default'}"
+
+        if (spec := self.embeds.get((form, attach))) is None:
+            utils.metrics.increment("embeds", stage=stage, result="miss")
+
+            # a tab that is already being prefetched is waited on, not built twice
+            with utils.metrics.span(stage):
+                spec = await self._builds.run(
+                    (form, attach), lambda: self._build(form, attach=attach)
+                )
+        else:
+            utils.metrics.increment("embeds", stage=stage, result="hit")
 
-        embed = self.base()
+        return spec.build()
+
+    async def _build(self, form: LichessUserEmbed | None, *, attach: bool) -> EmbedSpec:
+        description = None
         fields = []
+        image = None
 
         match form:
             case LichessUserEmbed.bio:
-                embed.description = self.description()
+                description = self.description()
 
                 # playtime
                 playtimes = []
@@ -205,10 +327,7 @@ class LichessUserFormatter:
                 else:
                     display_time = "0 minutes"
 
-                playtimes.append(
-                    f"{CONSTANTS['lichess']['emoji']['other']['stats']} {display_time} "
-                    + "played"
-                )
+                playtimes.append(f"{LICHESS.other['stats']} {display_time} " + "played")
 
                 if self.user.tvtime:
                     display_time = humanize.precisedelta(
@@ -220,17 +339,14 @@ class LichessUserFormatter:
                 else:
                     display_time = "0 minutes"
 
-                playtimes.append(
-                    f"{CONSTANTS['lichess']['emoji']['other']['tv']} {display_time} on "
-                    + "TV"
-                )
+                playtimes.append(f"{LICHESS.other['tv']} {display_time} on " + "TV")
 
                 playtime = "\n".join(playtimes)
 
                 # games
                 if self.user.total_games:
                     title = (
-                        f"{CONSTANTS['lichess']['emoji']['other']['challenge']} Games "
+                        f"{LICHESS.other['challenge']} Games "
                         + f"[{self.user.total_games}]"
                     )
                     fields.append(
@@ -254,24 +370,20 @@ class LichessUserFormatter:
                                 link.startswith("https://")
                                 or link.startswith("http://")
                             ):
-                                links.append(f"https://{link}")
+                                url = f"https://{link}"
                             else:
-                                links.append(link)
+                                url = link
+
+                            links.append(utils.markdown.link(link, url))
 
                     fields.append(
                         EmbedField(
-                            name=f"{CONSTANTS['lichess']['emoji']['other']['link']} "
-                            + "Links",
+                            name=f"{LICHESS.other['link']} " + "Links",
                             value="\n".join(links),
                             inline=False,
                         )
                     )
 
-                embed._fields = filter(
-                    None,
-                    fields,
-                )
-
             case LichessUserEmbed.rating:
                 # otb
                 otb_ratings = {}
@@ -285,8 +397,7 @@ class LichessUserFormatter:
                 if otb_ratings:
                     fields.append(
                         EmbedField(
-                            name=f"{CONSTANTS['lichess']['emoji']['other']['stats']} "
-                            + "OTB",
+                            name=f"{LICHESS.other['stats']} " + "OTB",
                             value="\n".join(
                                 [f"{v} {k}" for k, v in otb_ratings.items()]
                             ),
@@ -307,21 +418,19 @@ class LichessUserFormatter:
                         continue
 
                     if performance.progression:
-                        emoji = CONSTANTS["lichess"]["emoji"]["other"][
+                        emoji = LICHESS.other[
                             ["down", "up"][performance.progression > 0]
                         ]
                         display_progression = f"{emoji} {performance.progression}"
                     else:
                         display_progression = ""
 
-                    display_mode = CONSTANTS["lichess"]["emoji"]["modes"].get(
-                        mode.name, "♟️"
-                    )
+                    display_mode = LICHESS.modes.get(mode.name, "♟️")
 
                     fields.append(
                         EmbedField(
                             name=f"{display_mode} {mode.value} [{performance.games}]",
-                            value=f"{CONSTANTS['lichess']['emoji']['other']['rating']} "
+                            value=f"{LICHESS.other['rating']} "
                             + f"{performance.rating}"
                             + f" ± {performance.deviation}\n{display_progression}"
                             * bool(performance.deviation),
@@ -329,20 +438,201 @@ class LichessUserFormatter:
                         )
                     )
 
-                embed._fields = filter(
-                    None,
-                    fields,
-                )
-
             case LichessUserEmbed.history:
-                url = await upload(
-                    self.bot, hikari.files.Bytes(self.graph(), "graph.png")
-                )
+                args = self._graph_args()
+                key = self._graph_key(args)
+                image = None if attach else utils.render.cache.urls.get(key)
+
+                if image is None:
+                    try:
+                        graph = await self._graph(args, key)
+                    except RenderUnavailable:
+                        # not cached, so that the graph is retried next time
+                        return replace(
+                            self.base(),
+                            description="*The rating graph is busy right now. "
+                            + "Try again in a moment.*",
+                        )
 
-                embed.set_image(url)
+                    image = hikari.files.Bytes(graph, GRAPH_PROFILE.filename)
+
+                    if not attach:
+                        image = await upload(self.bot, image)
+                        utils.render.cache.urls.set(key, image)
 
             case _:
-                embed.description = self.description()
+                description = self.description()
 
-        self.embeds[form] = copy.deepcopy(embed)
-        return embed
+        spec = replace(
+            self.base(), description=description, fields=tuple(fields), image=image
+        )
+        self.embeds[form, attach] = spec
+        return spec
+
+    def prefetch(self, *forms: LichessUserEmbed) -> None:
+        """Starts building embeds in the background, before anyone picks them.
+
+        Only `LICHESS_PREFETCH_CONCURRENCY` prefetches run at once across the bot.
+
+        Args:
+            *forms (LichessUserEmbed): The embeds to build, in order.
+        """
+        self._prefetch = asyncio.create_task(self._prefetch_all(forms))
+
+    async def _prefetch_all(self, forms: tuple[LichessUserEmbed, ...]) -> None:
+        for form in forms:
+            async with _PREFETCHES:
+                try:
+                    await self.embed(form)
+                except Exception:
+                    # picking the tab builds it again, and shows what went wrong
+                    return
+
+    def close(self) -> None:
+        """Cancels any embeds that are still being built."""
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
+
+        self._builds.cancel()
+
+
+def ratings_table(users: list[LichessUser], missing: list[str]) -> hikari.Embed:
+    """Creates an embed comparing the ratings of several users.
+
+    Args:
+        users (list[LichessUser]): The users to compare, in order.
+        missing (list[str]): The usernames that were not found.
+
+    Returns:
+        hikari.Embed: The embed to send.
+    """
+    rows = [["User", *COMPARE_MODES.values()]]
+    closed = []
+
+    for user in users:
+        if user.disabled:
+            closed.append(user.username)
+            continue
+
+        performances = {perf.mode: perf for perf in user.performances or []}
+        row = [user.username]
+
+        for mode in COMPARE_MODES:
+            if (perf := performances.get(mode)) is None or not perf.games:
+                row.append("-")
+            else:
+                # lichess flags provisional ratings itself; older responses only
+                # have the deviation, which makes a rating provisional from 110
+                provisional = (
+                    perf.provisional
+                    if perf.provisional is not None
+                    else (perf.deviation or 0) >= 110
+                )
+                row.append(f"{perf.rating}{'?' * provisional}")
+
+        rows.append(row)
+
+    widths = [max(map(len, column)) for column in zip(*rows)]
+    table = "\n".join(
+        " ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in rows
+    )
+
+    sections = [f"```\n{table}\n```" if len(rows) > 1 else "*No users were found.*"]
+
+    if closed:
+        sections.append(f"*Closed: {utils.markdown.escape(', '.join(closed))}*")
+    if missing:
+        sections.append(f"*Not found: {utils.markdown.escape(', '.join(missing))}*")
+
+    return hikari.Embed(
+        title="Lichess Ratings", description="\n".join(sections)
+    ).set_thumbnail(LICHESS.logo)
+
+
+def _score(results: list[int]) -> str:
+    wins, draws, losses = results
+    games = wins + draws + losses
+    return f"{wins}/{draws}/{losses} · {(wins + draws / 2) / games:.0%}"
+
+
+def games_embed(stats: LichessGameStats, status: str) -> hikari.Embed:
+    """Creates an embed summarizing a user's games.
+
+    Results are shown as wins, draws and losses, along with the user's score.
+
+    Args:
+        stats (LichessGameStats): The games that have been counted so far.
+        status (str): How far along counting the games is.
+
+    Returns:
+        hikari.Embed: The embed to send.
+    """
+    description = [f"*{status}*"]
+    if (rating := stats.opponent_rating) is not None:
+        description.append(f"{LICHESS.other['rating']} Average opponent: {rating}")
+
+    fields = []
+
+    if stats.games:
+        fields.append(
+            EmbedField(
+                name=f"{LICHESS.other['challenge']} Results [{stats.games}]",
+                value="\n".join(
+                    f"{color.title()}: {_score(results)}"
+                    for color, results in stats.colors.items()
+                    if sum(results)
+                ),
+                inline=False,
+            )
+        )
+
+    if speeds := [
+        f"{LICHESS.modes.get(speed, '♟️')} {LichessMode[speed].value} "
+        + f"[{sum(results)}]: {_score(results)}"
+        for speed in SPEEDS
+        if sum(results := stats.speeds[speed])
+    ]:
+        fields.append(
+            EmbedField(
+                name=f"{LICHESS.other['stats']} Time controls",
+                value="\n".join(speeds),
+                inline=False,
+            )
+        )
+
+    if openings := stats.top_openings(5):
+        fields.append(
+            EmbedField(
+                name="📖 Openings",
+                value="\n".join(
+                    f"{utils.markdown.escape(name)} [{sum(results)}]: {_score(results)}"
+                    for name, results in openings
+                ),
+                inline=False,
+            )
+        )
+
+    if stats.endings:
+        endings = sorted(stats.endings.items(), key=lambda item: -item[1])[:5]
+        fields.append(
+            EmbedField(
+                name="🏁 Endings",
+                value=", ".join(
+                    f"{ending} {count / stats.games:.0%}" for ending, count in endings
+                ),
+                inline=False,
+            )
+        )
+
+    return EmbedSpec(
+        title=f"{stats.username}'s games",
+        url=f"https://lichess.org/@/{stats.username.lower()}/all",
+        thumbnail=LICHESS.logo,
+        description="\n".join(description),
+        fields=tuple(fields),
+    ).build()
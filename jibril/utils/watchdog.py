@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+import hikari
+import lightbulb
+
+from utils.defaults import env
+
+_LOGGER = logging.getLogger("jibril.watchdog")
+
+
+class Watchdog:
+    """Logs the stack of whatever blocks the event loop for too long.
+
+    The loop bumps a heartbeat every few milliseconds, and a thread checks that it keeps
+    doing so. Once the heartbeat is `threshold` seconds late, the thread logs what the
+    loop's thread is running at that moment, and then how long it was blocked for once
+    the loop is free again. Neither relies on asyncio's debug mode, so both work under
+    uvloop.
+
+    Args:
+        threshold (float): How long the loop can be blocked for before its stack is
+            logged, in seconds. The watchdog is disabled if this is 0.
+    """
+
+    __slots__ = ("threshold", "_beat", "_handle", "_thread", "_stopped")
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self._beat = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def _tick(self) -> None:
+        self._beat = time.monotonic()
+        self._handle = asyncio.get_running_loop().call_later(
+            self.threshold / 4, self._tick
+        )
+
+    def _watch(self, thread: int) -> None:
+        stalled = None
+
+        while not self._stopped.wait(self.threshold / 4):
+            beat = self._beat
+            late = time.monotonic() - beat
+
+            if late < self.threshold:
+                if stalled is not None:
+                    _LOGGER.warning(
+                        "event loop was blocked for about %.3fs", beat - stalled
+                    )
+                    stalled = None
+                continue
+
+            if stalled is None and (frame := sys._current_frames().get(thread)):
+                stalled = beat
+                _LOGGER.warning(
+                    "event loop has been blocked for %.3fs, in:\n%s",
+                    late,
+                    "".join(traceback.format_stack(frame)).rstrip(),
+                )
+
+    async def start(self, _: hikari.StartingEvent | None = None) -> None:
+        """Starts watching the running event loop, if the watchdog is enabled."""
+        if not self.threshold or self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._tick()
+        self._thread = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(),),
+            name="watchdog",
+            daemon=True,
+        )
+        self._thread.start()
+
+    async def stop(self, _: hikari.StoppedEvent | None = None) -> None:
+        """Stops watching the event loop."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        if self._thread is not None:
+            self._stopped.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    def attach(self, bot: lightbulb.BotApp) -> None:
+        """Watches a bot's event loop for as long as the bot runs.
+
+        Args:
+            bot (lightbulb.BotApp): The bot to watch.
+        """
+        bot.subscribe(hikari.StartingEvent, self.start)
+        bot.subscribe(hikari.StoppedEvent, self.stop)
+
+
+watchdog = Watchdog(env("WATCHDOG_THRESHOLD", 0.0))
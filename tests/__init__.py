@@ -0,0 +1,11 @@
+"""Tests for Jibril. Run with `python -m unittest` from the repository root."""
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).parent.parent
+
+# the bot imports its own modules from its directory, and the benchmarks share their
+# stand-ins and synthetic data with the tests
+for path in (ROOT / "jibril", ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
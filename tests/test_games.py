@@ -0,0 +1,93 @@
+import asyncio
+import random
+import tracemalloc
+import unittest
+
+from fakes import FakeLichess
+from synthetic import game
+
+import utils.http
+from utils.models.games import LichessGameStats, export
+
+USERNAME = "Tester"
+
+
+class ExportTest(unittest.IsolatedAsyncioTestCase):
+    """Game exports must be counted as they stream in, and stop when abandoned."""
+
+    async def asyncSetUp(self) -> None:
+        """Points the Lichess client at a stand-in, until the test is over."""
+        # debug mode reports every slow callback, and tens of thousands of games are
+        # streamed here
+        asyncio.get_running_loop().set_debug(False)
+        self.lichess = FakeLichess()
+        url = utils.http.lichess.url
+        utils.http.lichess.url = await self.lichess.start()
+
+        async def restore() -> None:
+            await utils.http.lichess.close()
+            await self.lichess.close()
+            utils.http.lichess.url = url
+
+        self.addAsyncCleanup(restore)
+
+    async def analyse(self, limit: int) -> tuple[LichessGameStats, int]:
+        """Counts the user's recent games, and the peak memory allocated doing so."""
+        stats = LichessGameStats(USERNAME)
+
+        tracemalloc.start()
+        try:
+            async for item in export(USERNAME, limit=limit):
+                stats.add(item)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return stats, peak
+
+    async def test_streamed_stats(self) -> None:
+        """Streamed games are counted exactly as if they had all been loaded."""
+        stats, _ = await self.analyse(1_000)
+
+        # the stand-in makes the same games from the username every time
+        rng = random.Random(USERNAME)
+        expected = LichessGameStats(USERNAME)
+        for _ in range(1_000):
+            expected.add(game(USERNAME, rng))
+
+        self.assertEqual(stats.games + stats.skipped, 1_000)
+        for name in LichessGameStats.__slots__:
+            with self.subTest(name=name):
+                self.assertEqual(getattr(stats, name), getattr(expected, name))
+
+    async def test_flat_memory(self) -> None:
+        """Counting an export takes far less memory than the export itself."""
+        # the first export also opens the connection pool and fills caches
+        await self.analyse(100)
+        stats, peak = await self.analyse(20_000)
+
+        # the export is over 7 MiB; the stand-in's buffers are traced too, and are what
+        # most of the peak is
+        self.assertEqual(stats.games + stats.skipped, 20_000)
+        self.assertLess(peak, 1024 * 1024, "memory grows with every game")
+
+    async def test_stopping_closes_export(self) -> None:
+        """Stopping an analysis part way closes the export."""
+        stats = LichessGameStats(USERNAME)
+
+        async def count() -> None:
+            async for item in export(USERNAME):
+                stats.add(item)
+                if stats.games == 1_000:
+                    task.cancel()
+                    # lets the cancellation land mid-stream
+                    await asyncio.sleep(0)
+
+        task = asyncio.create_task(count())
+        await asyncio.wait([task])
+        self.assertTrue(task.cancelled())
+
+        # any games written after this point went to a closed connection
+        sent = self.lichess.exported
+        await asyncio.sleep(0.5)
+        self.assertEqual(self.lichess.exported, sent)
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy
+
+from benchmarks.graphs import difference, downsampled, series
+import utils.graphs
+
+# the most that a downsampled graph may differ from the full one, on average
+TOLERANCE = 0.02
+
+
+class DownsampleTest(unittest.TestCase):
+    """Downsampling must not change what a rating graph shows."""
+
+    def assertPreserved(
+        self,
+        days: numpy.ndarray,
+        ratings: numpy.ndarray,
+        start: int,
+        end: int,
+        columns: int,
+    ) -> None:
+        """Fails unless downsampling keeps the outline of every pixel column."""
+        thin_days, thin_ratings = utils.graphs.downsample(
+            days, ratings, start, end, columns
+        )
+        self.assertLessEqual(len(thin_days), max(len(days), 4 * columns))
+
+        # every point that is kept is one of the originals, in order
+        indices = numpy.searchsorted(days, thin_days)
+        numpy.testing.assert_array_equal(days[indices], thin_days)
+        numpy.testing.assert_array_equal(ratings[indices], thin_ratings)
+        self.assertTrue(numpy.all(numpy.diff(indices) > 0), "points were reordered")
+
+        def column(values: numpy.ndarray) -> numpy.ndarray:
+            return (values.astype(numpy.int64) - start) * columns // max(end - start, 1)
+
+        full, thin = column(days), column(thin_days)
+        for pixel in numpy.unique(full):
+            before, after = ratings[full == pixel], thin_ratings[thin == pixel]
+            self.assertEqual(after.min(), before.min(), f"lowest of column {pixel}")
+            self.assertEqual(after.max(), before.max(), f"highest of column {pixel}")
+
+            before, after = days[full == pixel], thin_days[thin == pixel]
+            self.assertEqual(after[0], before[0], f"first of column {pixel}")
+            self.assertEqual(after[-1], before[-1], f"last of column {pixel}")
+
+    def test_random_series(self) -> None:
+        """Random series keep the outline of every column."""
+        rng = numpy.random.default_rng(0)
+        thinned = 0
+
+        for i in range(300):
+            span = int(rng.integers(1, 8000))
+            count = int(rng.integers(1, span + 1))
+            days = numpy.sort(rng.choice(span, count, replace=False))
+            days = (days + int(rng.integers(0, 20000))).astype(numpy.int32)
+            ratings = (1500 + rng.normal(0, 20, count).cumsum()).astype(numpy.int16)
+
+            # other modes can stretch the axis on either side
+            start = int(days[0]) - int(rng.integers(0, 500))
+            end = int(days[-1]) + int(rng.integers(0, 500))
+            columns = int(rng.integers(1, 800))
+
+            with self.subTest(series=i, points=count, columns=columns):
+                self.assertPreserved(days, ratings, start, end, columns)
+            thinned += count > 4 * columns
+
+        # the outline can only be lost if points are actually dropped
+        self.assertGreater(thinned, 100)
+
+    def test_short_series_are_unchanged(self) -> None:
+        """Series with few enough points are returned as they are."""
+        days = numpy.arange(100, dtype=numpy.int32)
+        ratings = numpy.arange(100, dtype=numpy.int16)
+
+        thin_days, thin_ratings = utils.graphs.downsample(days, ratings, 0, 99, 25)
+
+        self.assertIs(thin_days, days)
+        self.assertIs(thin_ratings, ratings)
+
+    def test_graphs_look_the_same(self) -> None:
+        """Long histories are drawn almost exactly as they would be in full."""
+        profile = utils.graphs.PROFILES["discord"]
+
+        for years in (10, 20):
+            data = series(years, 15, density=1.0)
+            thin = downsampled(data, profile)
+            self.assertLess(
+                sum(len(days) for _, days, *_ in thin),
+                sum(len(days) for _, days, *_ in data),
+            )
+
+            diff = difference(
+                utils.graphs.rating_history("Test", data, profile),
+                utils.graphs.rating_history("Test", thin, profile),
+            )
+            with self.subTest(years=years):
+                self.assertLess(diff, TOLERANCE)
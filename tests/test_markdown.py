@@ -0,0 +1,81 @@
+import random
+import re
+import unittest
+
+from benchmarks.markdown import MARKDOWN, PIECES, PLAIN, legacy
+from utils.markdown import escape, link
+
+MENTION = re.compile(r"@(everyone|here|[!&]?[0-9]{17,20})")
+URL = "https://lichess.org/@/someone"
+
+
+def random_text(rng: random.Random) -> str:
+    """Strings together random markdown, links, mentions and plain text."""
+    return "".join(rng.choices(PIECES, k=rng.randint(0, 40)))
+
+
+class EscapeTest(unittest.TestCase):
+    """Escaping in a single pass must match the two passes it replaced."""
+
+    def test_random_text(self) -> None:
+        """Random text is escaped exactly as it used to be."""
+        rng = random.Random(0)
+
+        for _ in range(100000):
+            text = random_text(rng)
+            self.assertEqual(escape(text), legacy(text), text)
+
+    def test_bios(self) -> None:
+        """Bios, and the lack of one, are escaped exactly as they used to be."""
+        for text in (None, "", PLAIN, MARKDOWN):
+            with self.subTest(text=text):
+                self.assertEqual(escape(text), legacy(text))
+
+
+class LinkTest(unittest.TestCase):
+    """The text of a masked link must be shown exactly as it was written."""
+
+    def read(self, masked: str) -> str:
+        """Reads back the text of a masked link the way Discord displays it."""
+        self.assertTrue(masked.startswith("["), masked)
+        self.assertTrue(masked.endswith(f"]({URL})"), masked)
+
+        shown = []
+        escaped = False
+
+        for char in masked[1 : -len(URL) - 3]:  # noqa: E203
+            if escaped:
+                shown.append(char)
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            else:
+                # an unescaped bracket would end the link early
+                self.assertNotIn(char, "[]", masked)
+                shown.append(char)
+
+        self.assertFalse(escaped, masked)
+        return "".join(shown)
+
+    def test_random_text(self) -> None:
+        """Random text reads back as written, apart from mentions."""
+        rng = random.Random(0)
+
+        for _ in range(100000):
+            text = random_text(rng)
+            # mentions are the only thing that is changed, so that they do not ping
+            self.assertEqual(
+                self.read(link(text, URL)), MENTION.sub("@\u200b\\1", text), text
+            )
+
+    def test_masked_link_in_text(self) -> None:
+        """Each bracket of a masked link in the text is escaped exactly once."""
+        self.assertEqual(link("[x](y)", URL), f"[\\[x\\](y)]({URL})")
+        self.assertEqual(link("\\[", URL), f"[\\\\\\[]({URL})")
+
+    def test_url(self) -> None:
+        """Characters that would end the link are percent-encoded in its URL."""
+        self.assertEqual(
+            link("a", "https://lichess.org/@/a b)"),
+            "[a](https://lichess.org/@/a%20b%29)",
+        )
@@ -0,0 +1,69 @@
+from datetime import date
+import random
+import unittest
+
+import numpy
+from synthetic import public_data, rating_history
+
+from benchmarks.refresh import EPOCH, play
+from utils.models.lichess import LichessHistorySnapshot, LichessUser
+
+
+class RefreshTest(unittest.TestCase):
+    """A history refreshed from a newer profile must match a full reload."""
+
+    def assertSameHistory(self, a: list, b: list) -> None:
+        """Fails unless two parsed histories are identical, down to their types."""
+        self.assertEqual(len(a), len(b))
+
+        for x, y in zip(a, b):
+            self.assertIs(x.mode, y.mode)
+            self.assertEqual(x.days.dtype, y.days.dtype)
+            self.assertEqual(x.ratings.dtype, y.ratings.dtype)
+            numpy.testing.assert_array_equal(x.days, y.days)
+            numpy.testing.assert_array_equal(x.ratings, y.ratings)
+
+    def test_random_games(self) -> None:
+        """Refreshes match a full reload, and are only refused when one is needed."""
+        rng = random.Random(0)
+        refreshed = refused = 0
+
+        for i in range(200):
+            history = rating_history(
+                years=1, density=0.3, modes=rng.randint(1, 6), seed=i
+            )
+            last = max(
+                (date(year, month + 1, day) - EPOCH).days
+                for mode in history
+                for year, month, day, _ in mode["points"]
+            )
+            day = last + rng.choice([0, 0, 1, 2, 5])
+            profile = public_data(f"user{i}", i, history)
+
+            snapshot = LichessHistorySnapshot.take(
+                profile, LichessUser.parse_history(history), day
+            )
+            self.assertIsNotNone(snapshot)
+
+            for _ in range(rng.randint(0, 4)):
+                # a day passes now and then, after which a refresh must be refused
+                if passed := rng.random() < 0.1:
+                    day += 1
+                history, profile, new = play(rng, history, profile, day)
+
+                if (snapshot := snapshot.refresh(profile, day)) is None:
+                    self.assertTrue(passed or new, "refused a possible refresh")
+                    refused += 1
+                    snapshot = LichessHistorySnapshot.take(
+                        profile, LichessUser.parse_history(history), day
+                    )
+                    continue
+
+                self.assertSameHistory(
+                    snapshot.history, LichessUser.parse_history(history)
+                )
+                refreshed += 1
+
+        # both outcomes must actually be exercised
+        self.assertGreater(refreshed, 0)
+        self.assertGreater(refused, 0)
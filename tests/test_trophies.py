@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+import orjson
+
+from benchmarks.trophies import FIXTURES, Response, legacy
+from utils.models.lichess import _scrape
+
+# pages written by hand, rather than around where the parser stops
+PAGES = {
+    "no landmarks": (
+        '<div class="box"><a class="trophy award-icon coach"></a>'
+        + '<p>bio</p><a class="trophy perf top50 fire-trophy"></a></div>'
+    ),
+    "nested and void elements": (
+        '<div class="trophies"><span><img src="x"><br></span>'
+        + '<a class="trophy award-icon patron"><img src="y"></a>'
+        + '<div><div><a class="trophy streamer"></a></div></div></div>'
+        + '<div class="angles"></div>'
+    ),
+    "several known classes": (
+        '<div class="trophies"><a class="trophy moderator coach patron"></a></div>'
+    ),
+    "unknown classes": (
+        '<div class="trophies"><a class="trophy award-icon someday-trophy"></a>'
+        + '<a class="trophy developer"></a></div>'
+    ),
+    "no trophies": (
+        '<h1 class="user-link">Someone</h1><div class="angles"><a>Activity</a></div>'
+    ),
+    "empty": "",
+}
+
+
+def scrape(scraper: object, page: bytes, chunk: int | None = None) -> list[str]:
+    """Scrapes a page from memory.
+
+    Returns:
+        list[str]: The emoji of every trophy that was found.
+    """
+    return orjson.loads(asyncio.run(scraper(Response(page, chunk))))
+
+
+class ScrapeTest(unittest.TestCase):
+    """Streaming trophy extraction must agree with the parser it replaced."""
+
+    def test_fixtures(self) -> None:
+        """Every fixture gives the same trophies, and is read to the end."""
+        paths = sorted(FIXTURES.glob("*.html"))
+        self.assertTrue(paths)
+
+        for path in paths:
+            with self.subTest(fixture=path.name):
+                page = path.read_bytes()
+                response = Response(page)
+                found = orjson.loads(asyncio.run(_scrape(response)))
+
+                self.assertEqual(found, scrape(legacy, page))
+                # or the connection could not be reused
+                self.assertEqual(response.read, len(page))
+
+    def test_handwritten_pages(self) -> None:
+        """Pages that do not look like the fixtures give the same trophies."""
+        for name, page in PAGES.items():
+            page = page.encode()
+            for chunk in (None, 1):
+                with self.subTest(page=name, chunk=chunk):
+                    self.assertEqual(scrape(_scrape, page, chunk), scrape(legacy, page))
+
+    def test_chunk_boundaries(self) -> None:
+        """Tags and characters split between chunks are still found."""
+        page = (FIXTURES / "trophies.html").read_bytes()
+        expected = scrape(legacy, page)
+        self.assertTrue(expected)
+
+        for chunk in (1, 7, 64, 1000):
+            with self.subTest(chunk=chunk):
+                self.assertEqual(scrape(_scrape, page, chunk), expected)